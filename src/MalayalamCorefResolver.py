@@ -1,35 +1,181 @@
-from indicnlp.tokenize import sentence_tokenize
-from mlmorph import Analyser
+from collections import deque
 
 from external.devdath.wrapper import MalayalamShallowParser
-from hobbs import resolve_pronouns
+from hobbs import resolve_pronouns, resolve_sentence
+from instrumentation import NULL_METRICS
+from morph_lexicon import MorphFeatureLexicon
+from tree_index import TreeIndex, escape_brackets
+
+SENTENCE_TERMINATORS = (".", "?", "!", "।", "॥")
 
 
 class MalayalamCorefResolver:
     """
     Malayalam Coreference Resolver using Shallow Parsing + Hobbs' Algorithm.
+
+    Heavy dependencies and models (indicnlp, the mlmorph analyser, CRF models,
+    sandhi splitter processes) are loaded on first use; call ``warmup`` to load
+    them up front.
     """
-    def __init__(self):
-        self.morph_analyzer = Analyser()
-        self.shallow_parser = MalayalamShallowParser()
+    def __init__(self, sandhi_workers: int = 0, crf_backend: str = "auto", morph_cache_size: int = 4096,
+                 morph_store=None, parse_cache_size: int = 0, parse_cache_path=None, metrics=None):
+        """
+        Args:
+            metrics: Optional ``instrumentation.Metrics`` receiving stage timings and
+                external tool counters. Instrumentation is off when omitted.
+        """
+        self.metrics = metrics or NULL_METRICS
+        self.morph_lexicon = MorphFeatureLexicon(maxsize=morph_cache_size, store_path=morph_store,
+                                                 metrics=self.metrics)
+        self.shallow_parser = MalayalamShallowParser(sandhi_workers=sandhi_workers, crf_backend=crf_backend,
+                                                     parse_cache_size=parse_cache_size,
+                                                     parse_cache_path=parse_cache_path, metrics=self.metrics)
+
+    @property
+    def morph_analyzer(self):
+        """The mlmorph analyser, built on first access."""
+        return self.morph_lexicon.analyser
+
+    def warmup(self, start_processes=True):
+        """
+        Import and load everything the pipeline needs, so the first document is
+        not slower than the rest. Long-running servers call this once at startup.
+
+        Args:
+            start_processes: Also start external sandhi splitter processes. Pass
+                False in a parent that forks workers afterwards; each worker then
+                starts its own, while the loaded models are shared copy-on-write.
+        """
+        self.split_sentences("")
+        self.morph_lexicon.analyser  # the property builds the analyser
+        self.shallow_parser.warmup(start_processes)
+        return self
+
+    def close(self):
+        """Release external processes held by the shallow parser."""
+        self.shallow_parser.close()
+        self.morph_lexicon.close()
 
     def find_coref(self, text):
         """
         Run full Malayalam Hobbs pipeline and return structured output.
         """
-        processed_doc = []
-        tokenised_sentences = [s.strip() for s in sentence_tokenize.sentence_split(text, lang='ml') if s.strip()]
-        for sent in tokenised_sentences:
-            pos_tags = self.shallow_parser.tag_parts_of_speech(sent)
-            chunks = self.shallow_parser.chunking(pos_tags)
-            processed_doc.append(chunks)
+        with self.metrics.stage("sentence_split"):
+            tokenised_sentences = self.split_sentences(text)
+        processed_doc = self.shallow_parser.shallow_parse_batch(tokenised_sentences)
+        return self.resolve_processed_doc(tokenised_sentences, processed_doc)
+
+    def find_coref_batch(self, texts):
+        """
+        Run the pipeline over many documents, tagging all of their sentences with
+        one POS and one chunking CRF++ run. Returns one result per document, as
+        ``find_coref`` would.
+        """
+        with self.metrics.stage("sentence_split"):
+            docs = [self.split_sentences(text) for text in texts]
+        processed = self.shallow_parser.shallow_parse_batch([sent for doc in docs for sent in doc])
+
+        results = []
+        start = 0
+        for tokenised_sentences in docs:
+            end = start + len(tokenised_sentences)
+            results.append(self.resolve_processed_doc(tokenised_sentences, processed[start:end]))
+            start = end
+        return results
+
+    def find_coref_stream(self, chunks, window=10):
+        """
+        Resolve a stream of text incrementally, yielding each sentence as soon as it is resolved.
+
+        Args:
+            chunks: Iterable of text pieces: single sentences, paragraphs or arbitrary
+                slices of a document. The last complete sentence seen so far, and
+                any unfinished text after it, is held back until the next piece
+                arrives, since the sentence splitter may still merge it with what
+                follows (e.g. a one-word dateline or an abbreviation ending in a
+                period).
+            window: Number of previous sentences kept for the backward antecedent
+                search, or None to keep all of them. Memory use is bounded by the
+                window, not the document length.
+
+        Yields:
+            Dicts with "sentence_id", "sentence", "tokens" and "coref" (pronoun token
+            index → candidates). These match ``find_coref`` on the whole text whenever
+            every antecedent lies within ``window`` sentences of its pronoun.
+        """
+        trees = deque(maxlen=None if window is None else window + 1)
+        sent_no = 0
+        pending = ""
+
+        for chunk in chunks:
+            text = pending + chunk
+            with self.metrics.stage("sentence_split"):
+                sentences = self.split_sentences(text)
+            pending = ""
+            if sentences:
+                # Re-split from the start of the last complete sentence once more text is in
+                held = 1 if text.rstrip().endswith(SENTENCE_TERMINATORS) else 2
+                tail = sentences[-held:]
+                del sentences[-held:]
+                pending = text[self._suffix_start(text, tail):]
+
+            for result in self._resolve_stream_sentences(sentences, trees, sent_no):
+                sent_no += 1
+                yield result
+
+        if pending.strip():
+            yield from self._resolve_stream_sentences(self.split_sentences(pending), trees, sent_no)
 
+    @staticmethod
+    def _suffix_start(text, sentences):
+        """
+        Offset in ``text`` where its last split ``sentences`` begin.
+
+        The splitter strips and rejoins whitespace, so the sentences are located by
+        counting their non-space characters back from the end of the text.
+        """
+        remaining = sum(len(word) for sentence in sentences for word in sentence.split())
+        start = len(text)
+        while remaining and start:
+            start -= 1
+            if not text[start].isspace():
+                remaining -= 1
+        return start
+
+    def _resolve_stream_sentences(self, sentences, trees, sent_no):
+        for sentence, chunks in zip(sentences, self.shallow_parser.shallow_parse_batch(sentences)):
+            with self.metrics.stage("tree_build"):
+                trees.append(TreeIndex.from_chunks(chunks))
+            tokens = [tok for tok, _, _ in chunks]
+            pron_indices = self.build_pronoun_map([chunks]).get(0, [])
+            self.metrics.count("sentences")
+            self.metrics.count("pronouns", len(pron_indices))
+            with self.metrics.stage("hobbs"):
+                coref = resolve_sentence(tokens, trees, len(trees) - 1, pron_indices, self.morph_lexicon)
+            yield {"sentence_id": sent_no, "sentence": sentence, "tokens": tokens, "coref": coref}
+            sent_no += 1
+
+    @staticmethod
+    def split_sentences(text):
+        """Split a document into stripped, non-empty sentences."""
+        # indicnlp pulls in pandas; import it only when a document arrives
+        from indicnlp.tokenize import sentence_tokenize
+
+        return [s.strip() for s in sentence_tokenize.sentence_split(text, lang='ml') if s.strip()]
+
+    def resolve_processed_doc(self, tokenised_sentences, processed_doc):
+        """Resolve pronouns of a document whose sentences are already shallow parsed."""
         tokens = [[tok for tok, _, _ in sent] for sent in processed_doc]
-        parsable_string = self.list_to_parsable_string(processed_doc)
+        with self.metrics.stage("tree_build"):
+            trees = [TreeIndex.from_chunks(sent) for sent in processed_doc]
         pronoun_map = self.build_pronoun_map(processed_doc)
+        self.metrics.count("documents")
+        self.metrics.count("sentences", len(processed_doc))
+        self.metrics.count("pronouns", sum(len(indices) for indices in pronoun_map.values()))
 
-        coref_groups = resolve_pronouns(tokens, parsable_string, pronoun_map, self.morph_analyzer,
-            return_all_candidates=False)
+        with self.metrics.stage("hobbs"):
+            coref_groups = resolve_pronouns(tokens, trees, pronoun_map, self.morph_lexicon,
+                return_all_candidates=False)
 
         return {"sentences": tokenised_sentences, "tokens": tokens, "coref": coref_groups}
 
@@ -45,10 +191,16 @@ class MalayalamCorefResolver:
 
     @staticmethod
     def list_to_parsable_string(chunks_list):
-        """Convert shallow parser chunks to Penn Treebank-style bracketed strings."""
+        """
+        Convert shallow parser chunks to Penn Treebank-style bracketed strings.
+
+        Brackets in tokens are written as ``-LRB-`` and ``-RRB-``. Only needed for
+        debugging or export; the resolver builds its trees with
+        ``TreeIndex.from_chunks``, which yields the same structure.
+        """
         treesentences = []
         for sentence in chunks_list:
-            treetext = "( S "
+            parts = ["( S "]
             layerstoclose = 1
             for token in sentence:
                 word, pos, chunk = token
@@ -56,16 +208,16 @@ class MalayalamCorefResolver:
                 # New chunk begins
                 if "B-" in chunk:
                     if layerstoclose > 1:
-                        treetext += " ) " * (layerstoclose - 1)
+                        parts.append(" ) " * (layerstoclose - 1))
                         layerstoclose = 1
-                    treetext += " ( CHUNK "
+                    parts.append(" ( CHUNK ")
                     layerstoclose += 1
                 # Add POS tags and token
                 for postag in postags:
-                    treetext += f" ( {postag}"
+                    parts.append(f" ( {postag}")
                     layerstoclose += 1
-                treetext += f" {word} ) " * 2
+                parts.append(f" {escape_brackets(word)} ) " * 2)
                 layerstoclose -= 2
-            treetext += " ) " * layerstoclose
-            treesentences.append(treetext)
-        return treesentences
\ No newline at end of file
+            parts.append(" ) " * layerstoclose)
+            treesentences.append("".join(parts))
+        return treesentences
@@ -0,0 +1,59 @@
+"""
+Check that the in-process CRF backend tags a reference corpus exactly like
+``crf_test`` and compare per-sentence tagging cost.
+
+Usage (from src/):
+    python -m benchmarks.crf_backends corpus.txt
+
+The corpus holds one Malayalam sentence per line.
+"""
+import argparse
+import time
+
+from external.devdath.crf_backend import InProcessCRFTagger, SubprocessCRFTagger
+from external.devdath.wrapper import MalayalamShallowParser
+
+
+def _timed(tagger, crf_inputs, per_sentence):
+    start = time.perf_counter()
+    if per_sentence:
+        outputs = [tagger.tag([block])[0] for block in crf_inputs]
+    else:
+        outputs = tagger.tag(crf_inputs)
+    return outputs, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("corpus", help="Text file with one sentence per line")
+    args = arg_parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+
+    parser = MalayalamShallowParser(crf_backend="subprocess")
+    pos_inputs = [parser.featurize_tokens(parser.tokenize_sandhi_text(parser.sandhi_split(s))) for s in sentences]
+
+    for model_path, name in ((parser.pos_model_path, "POS"), (parser.chunk_model_path, "Chunk")):
+        subprocess_tagger = SubprocessCRFTagger(model_path, name)
+        inprocess_tagger = InProcessCRFTagger(model_path, name)
+
+        if name == "POS":
+            crf_inputs = pos_inputs
+        else:
+            # Chunker input is the POS input with the predicted POS tag appended
+            pos_outputs = SubprocessCRFTagger(parser.pos_model_path, "POS").tag(pos_inputs)
+            crf_inputs = ["\n".join("\t".join(cols) for cols in rows) for rows in pos_outputs]
+
+        expected, _ = _timed(subprocess_tagger, crf_inputs, per_sentence=False)
+        _, subprocess_seconds = _timed(subprocess_tagger, crf_inputs, per_sentence=True)
+        actual, inprocess_seconds = _timed(inprocess_tagger, crf_inputs, per_sentence=True)
+
+        mismatches = sum(1 for e, a in zip(expected, actual) if e != a)
+        print(f"{name}: {len(sentences)} sentences, {mismatches} mismatching")
+        print(f"  subprocess  {subprocess_seconds / len(sentences) * 1e3:10.3f} ms/sentence")
+        print(f"  in-process  {inprocess_seconds / len(sentences) * 1e3:10.3f} ms/sentence")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compare CRF feature extraction and tagger I/O before and after the shared
+feature extractor.
+
+Before, POS and chunker rows were built separately for every token, and each
+CRF++ run read its input from a temporary file. Now each token's row is
+memoized, the chunker input is built from the POS output rows, and crf_test
+reads stdin.
+
+Usage (from src/):
+    python -m benchmarks.features [corpus.txt] --sentences 5000
+
+Without a corpus, sentences are drawn from a Zipf-like vocabulary. The
+crf_test comparison runs only when crf_test and the models are available.
+"""
+import argparse
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from external.devdath.features import chunk_input_from_rows, pos_input, token_features
+from external.irtokz.malayalam import get_malayalam_tokenizer
+
+LETTERS = [chr(c) for c in range(0x0D15, 0x0D39)] + ["ി", "ു", "ം", "്", "ാ", "െ"]
+
+
+def _legacy_row(token):
+    chars = list(token)
+    length = len(chars)
+    fo1 = ["".join(chars[:i + 1]) for i in range(length)]
+    ba1 = ["".join(chars[-(i + 1):]) for i in range(length)]
+    ba1.reverse()
+
+    def pad(seq, size, pad_value="NONE"):
+        if len(seq) >= size:
+            return seq[:size]
+        return seq + [pad_value] * (size - len(seq))
+
+    return [token] + pad(fo1, 3) + pad(ba1, 7) + [str(length)]
+
+
+def legacy_inputs(tokens, tags):
+    pos = "\n".join("\t".join(_legacy_row(t)) for t in tokens)
+    chunk = "\n".join("\t".join(_legacy_row(t) + [tag]) for t, tag in zip(tokens, tags))
+    return pos, chunk
+
+
+def new_inputs(tokens, tags):
+    pos = pos_input(tokens)
+    rows = [row.split("\t") + [tag] for row, tag in zip(pos.split("\n"), tags)]
+    return pos, chunk_input_from_rows(rows)
+
+
+def synthetic_sentences(n, seed=0):
+    rnd = random.Random(seed)
+    vocab = ["".join(rnd.choice(LETTERS) for _ in range(rnd.randint(2, 12))) for _ in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    return [rnd.choices(vocab, weights, k=rnd.randint(5, 30)) for _ in range(n)]
+
+
+def crf_test_seconds(model_path, crf_input, use_file):
+    start = time.perf_counter()
+    if use_file:
+        with tempfile.NamedTemporaryFile(mode="w", encoding="utf-8", delete=False) as tmp:
+            tmp.write(crf_input)
+        subprocess.run(["crf_test", "-m", str(model_path), tmp.name], capture_output=True, check=True)
+        Path(tmp.name).unlink()
+    else:
+        subprocess.run(["crf_test", "-m", str(model_path)], input=crf_input, encoding="utf-8",
+                       capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("corpus", nargs="?", help="Text file with one sentence per line")
+    arg_parser.add_argument("--sentences", type=int, default=5000)
+    args = arg_parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()][:args.sentences]
+        sentences = get_malayalam_tokenizer().tokenize_many(texts)
+    else:
+        sentences = synthetic_sentences(args.sentences)
+    tags = [["N__NN"] * len(tokens) for tokens in sentences]
+    n_tokens = sum(len(tokens) for tokens in sentences)
+
+    start = time.perf_counter()
+    legacy = [legacy_inputs(tokens, t) for tokens, t in zip(sentences, tags)]
+    legacy_seconds = time.perf_counter() - start
+
+    token_features.cache_clear()
+    start = time.perf_counter()
+    new = [new_inputs(tokens, t) for tokens, t in zip(sentences, tags)]
+    new_seconds = time.perf_counter() - start
+
+    temp_bytes = sum(len(p.encode("utf-8")) + len(c.encode("utf-8")) for p, c in legacy)
+    print(f"{len(sentences)} sentences, {n_tokens} tokens, identical CRF inputs: {legacy == new}")
+    print(f"  featurize (POS + chunk), before  {legacy_seconds / len(sentences) * 1e6:8.1f} us/sentence")
+    print(f"  featurize (POS + chunk), after   {new_seconds / len(sentences) * 1e6:8.1f} us/sentence"
+          f"  (memo hit rate {token_features.cache_info().hits / n_tokens:.0%})")
+    print(f"  temp file bytes written, before  {temp_bytes / len(sentences):8.1f} B/sentence; after: 0")
+
+    pos_model = Path(__file__).resolve().parent.parent / "external" / "devdath" / "models" / "devdath_pos.model"
+    if shutil.which("crf_test") is None or not pos_model.exists():
+        print("  crf_test or the POS model is missing; skipping the temp file vs pipe comparison")
+        return
+    crf_input = "\n\n".join(p for p, _ in new) + "\n"
+    file_seconds = crf_test_seconds(pos_model, crf_input, use_file=True)
+    pipe_seconds = crf_test_seconds(pos_model, crf_input, use_file=False)
+    print(f"  crf_test POS run, temp file      {file_seconds / len(sentences) * 1e6:8.1f} us/sentence")
+    print(f"  crf_test POS run, stdin pipe     {pipe_seconds / len(sentences) * 1e6:8.1f} us/sentence")
+
+
+if __name__ == "__main__":
+    main()
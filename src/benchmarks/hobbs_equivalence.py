@@ -0,0 +1,341 @@
+"""
+Check that pronoun resolution over the per-document candidate index gives the
+same antecedents as the original nltk implementation of hobbs.py.
+
+The original search and agreement check are kept below as the reference: trees
+are parsed from ``list_to_parsable_string`` output with ``nltk.Tree.fromstring``,
+every step walks the subtree breadth-first and looks each node's position up by
+equality with ``get_pos``, and every agreement check analyses both tokens again.
+Random documents mix NP, nominal, locative and verb chunks with pronouns, and a
+random analyser assigns conflicting features, so every branch of the search and
+the agreement check is exercised. Both whole documents and a sliding window of
+recent sentences (as in ``find_coref_stream``) are compared.
+
+Words are unique within a sentence. The original looked up the pronoun and
+every node by equality, so it resolved a repeated pronoun, or a node that had
+an identical copy earlier in the tree, through the first copy; the index uses
+the actual position instead.
+
+Usage (from src/):
+    python -m benchmarks.hobbs_equivalence --documents 3000
+"""
+import argparse
+import queue
+import random
+import time
+from collections import deque
+
+import nltk
+from nltk import Tree
+
+import hobbs
+from MalayalamCorefResolver import MalayalamCorefResolver
+from tree_index import TreeIndex
+
+TAGS = ["N__NN", "N__NNP", "PR__PRP", "V__VM", "RD__PUNC", "NP", "NN", "N__NNP__NN", "N__NST__LOCATIVE",
+        "LOCATIVE", "V__VM__VF"]
+PRONOUNS = ["അത്", "അവൻ", "ഇവിടെ", "അവിടെ", "അവൾതന്നെ"]
+
+NOMINAL_LABELS = {"PRP", "NNPS", "NNP", "NNS", "NN"}
+LOCATIVE_PRONOUNS = {"ഇവിടെ", "അവിടെ"}
+REFLEXIVE_SUFFIX = "തന്നെ"
+PERSONAL_PRONOUNS = {"അവൻ", "അവൾ", "അവർ", "അവള്", "അവന്‍"}
+DEMONSTRATIVES = {"ഇത്", "അത്", "ഇവ", "അവ"}
+
+
+def _first_analysis(analyser, token):
+    try:
+        analyses = analyser.analyse(token)
+        if analyses:
+            return analyses[0]
+    except Exception:
+        pass
+    return {}
+
+
+def _get_feat(analyser, token):
+    analys = _first_analysis(analyser, token)
+    feat = analys.get("feat", {}) if isinstance(analys, dict) else {}
+    out = {}
+    for k in ("gend", "num", "pers", "case"):
+        if k in feat:
+            out[k] = feat[k]
+    if "pos" in analys:
+        out["pos"] = analys["pos"]
+    return out
+
+
+def _morph_compatible(analyser, pronoun_tok, np_head_tok):
+    p = _get_feat(analyser, pronoun_tok)
+    a = _get_feat(analyser, np_head_tok)
+    if not p or not a:
+        return True
+    if p.get("pers") and a.get("pers") and p["pers"] != a["pers"]:
+        return False
+    if p.get("num") and a.get("num") and p["num"] != a["num"]:
+        return False
+    if p.get("gend") and a.get("gend") and p["gend"] != a["gend"]:
+        return False
+    if a.get("case") and a["case"] not in ("nom",):
+        return False
+    return True
+
+
+def _classify_pronoun(tok):
+    if tok in LOCATIVE_PRONOUNS:
+        return "locative"
+    if tok.endswith(REFLEXIVE_SUFFIX):
+        return "reflexive"
+    if tok in PERSONAL_PRONOUNS:
+        return "personal"
+    if tok in DEMONSTRATIVES:
+        return "demonstrative"
+    return "other"
+
+
+def _get_pos(tree, node):
+    for pos in tree.treepositions():
+        if tree[pos] == node:
+            return pos
+    return None
+
+
+def _bft(tree):
+    nodes = []
+    q = queue.Queue()
+    q.put(tree)
+    while not q.empty():
+        node = q.get()
+        nodes.append(node)
+        for child in node:
+            if isinstance(child, nltk.Tree):
+                q.put(child)
+    return nodes
+
+
+def _walk_to_np_or_s(tree, pos, label_to_check):
+    path = [pos]
+    while True:
+        pos = pos[:-1]
+        path.append(pos)
+        if label_to_check in tree[pos].label() or tree[pos].label() == "S":
+            return path, pos
+
+
+def _check_for_intervening_np(tree, pos, proposal, pro, label_to_check):
+    bf_pos = [_get_pos(tree, node) for node in _bft(tree[pos])]
+
+    def _count_np(t):
+        if not isinstance(t, nltk.Tree):
+            return 0
+        if label_to_check in t.label() and t.label() not in NOMINAL_LABELS:
+            return 1 + sum(_count_np(c) for c in t)
+        return sum(_count_np(c) for c in t)
+
+    if _count_np(tree[pos]) >= 3:
+        for node_pos in bf_pos:
+            if node_pos is None:
+                continue
+            if label_to_check in tree[node_pos].label() and tree[node_pos].label() not in NOMINAL_LABELS:
+                if node_pos != proposal and node_pos != _get_pos(tree, pro):
+                    if node_pos < proposal:
+                        return True
+    return False
+
+
+def _traverse_left(tree, pos, path, pro, label_to_check, check=1):
+    bf_pos = [_get_pos(tree, node) for node in _bft(tree[pos])]
+    for p in bf_pos:
+        if p is None:
+            continue
+        if p < path[0] and p not in path:
+            if label_to_check in tree[p].label():
+                if check == 1:
+                    if _check_for_intervening_np(tree, pos, p, pro, label_to_check):
+                        return tree, p
+                else:
+                    return tree, p
+    return None, None
+
+
+def _traverse_right(tree, pos, path, pro, label_to_check):
+    bf_pos = [_get_pos(tree, node) for node in _bft(tree[pos])]
+    for p in bf_pos:
+        if p is None:
+            continue
+        if p > path[0] and p not in path:
+            if label_to_check in tree[p].label() or tree[p].label() == "S":
+                if label_to_check in tree[p].label() and tree[p].label() not in NOMINAL_LABELS:
+                    return tree, p
+                return None, None
+        return None, None
+
+
+def _traverse_tree(tree, pro, label_to_check):
+    q = queue.Queue()
+    q.put(tree)
+    while not q.empty():
+        node = q.get()
+        if label_to_check in node.label():
+            return tree, _get_pos(tree, node)
+        for child in node:
+            if isinstance(child, nltk.Tree):
+                q.put(child)
+    return None, None
+
+
+def _hobbs(sents, pos, label_to_check):
+    sentence_id = len(sents) - 1
+    tree, pos = sents[-1], pos[:-1]
+    pro = tree[pos].leaves()[0].lower()
+    path, pos = _walk_to_np_or_s(tree, pos, label_to_check)
+    proposal = _traverse_left(tree, pos, path, pro, label_to_check)
+    while proposal == (None, None):
+        if pos == ():
+            sentence_id -= 1
+            if sentence_id < 0:
+                return None, None
+            proposal = _traverse_tree(sents[sentence_id], pro, label_to_check)
+            if proposal != (None, None):
+                return proposal
+        path, pos = _walk_to_np_or_s(tree, pos, label_to_check)
+        if label_to_check in tree[pos].label() and tree[pos].label() not in NOMINAL_LABELS:
+            for c in tree[pos]:
+                if isinstance(c, nltk.Tree) and c.label() in NOMINAL_LABELS:
+                    if _get_pos(tree, c) not in path:
+                        return tree, pos
+        proposal = _traverse_left(tree, pos, path, pro, label_to_check, check=0)
+        if proposal != (None, None):
+            return proposal
+        if tree[pos].label() == "S":
+            proposal = _traverse_right(tree, pos, path, pro, label_to_check)
+            if proposal != (None, None):
+                return proposal
+    return proposal
+
+
+def _apply_hobbs(temp_trees, pronoun_token, label_to_check):
+    pos = _get_pos(temp_trees[-1], pronoun_token)
+    if pos is None:
+        return None, None
+    return _hobbs(temp_trees, pos[:-1], label_to_check)
+
+
+def legacy_resolve_pronouns(words_list, parsable_strings, pronouns, analyser, return_all_candidates=False):
+    trees = [Tree.fromstring(s) for s in parsable_strings]
+    results = {}
+    for sent_no, pron_indices in pronouns.items():
+        temp_trees = trees[:sent_no + 1]
+        out_for_sent = {}
+        for pidx in pron_indices:
+            pro_tok = words_list[sent_no][pidx]
+            candidates = []
+            if _classify_pronoun(pro_tok) == "locative":
+                tree, pos = _apply_hobbs(temp_trees, pro_tok, "LOCATIVE")
+                if tree and pos:
+                    cand = str(tree[pos].leaves()[0])
+                    if _morph_compatible(analyser, pro_tok, cand):
+                        candidates.append(cand)
+                if candidates:
+                    out_for_sent[pidx] = candidates
+                continue
+            for label in ("NP", "NN"):
+                tree, pos = _apply_hobbs(temp_trees, pro_tok, label)
+                if not (tree and pos):
+                    continue
+                cand = str(tree[pos].leaves()[0])
+                if _morph_compatible(analyser, pro_tok, cand):
+                    candidates.append(cand)
+                    if not return_all_candidates:
+                        break
+            if candidates:
+                out_for_sent[pidx] = list(dict.fromkeys(candidates))
+        if out_for_sent:
+            results[sent_no] = out_for_sent
+    return results
+
+
+class RandomAnalyser:
+    """Deterministic per-token analyses with random, often conflicting features."""
+
+    def analyse(self, token):
+        rnd = random.Random(token)
+        if rnd.random() < 0.3:
+            return []
+        feat = {k: rnd.choice(["a", "b"]) for k in ("gend", "num", "pers") if rnd.random() < 0.5}
+        if rnd.random() < 0.3:
+            feat["case"] = rnd.choice(["nom", "acc"])
+        return [{"feat": feat, "pos": "n"}]
+
+
+def random_document(rnd):
+    doc = []
+    for _ in range(rnd.randint(1, 12)):
+        sent = []
+        for _ in range(rnd.randint(1, 12)):
+            token = rnd.choice(PRONOUNS) if rnd.random() < 0.2 else f"w{rnd.randint(0, 30)}"
+            if any(token == word for word, _, _ in sent):
+                continue
+            tag = "PR__PRP" if token in PRONOUNS and rnd.random() < 0.8 else rnd.choice(TAGS)
+            sent.append((token, tag, rnd.choice(["B-NP", "I-NP", "B-VGF"])))
+        doc.append(sent)
+    return doc
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--documents", type=int, default=3000)
+    arg_parser.add_argument("--window", type=int, default=3, help="Previous sentences kept in the streaming check")
+    arg_parser.add_argument("--seed", type=int, default=7)
+    args = arg_parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    analyser = RandomAnalyser()
+    n_docs = n_cases = mismatches = 0
+    legacy_seconds = indexed_seconds = 0.0
+    for _ in range(args.documents):
+        doc = random_document(rnd)
+        strings = MalayalamCorefResolver.list_to_parsable_string(doc)
+        try:
+            for s in strings:
+                Tree.fromstring(s)
+        except ValueError:
+            continue
+        trees = [TreeIndex.from_chunks(sent) for sent in doc]
+        words = [[token for token, _, _ in sent] for sent in doc]
+        pronouns = MalayalamCorefResolver.build_pronoun_map(doc)
+        n_docs += 1
+
+        for return_all in (False, True):
+            start = time.perf_counter()
+            expected = legacy_resolve_pronouns(words, strings, pronouns, analyser, return_all)
+            legacy_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            actual = hobbs.resolve_pronouns(words, trees, pronouns, analyser, return_all)
+            indexed_seconds += time.perf_counter() - start
+            n_cases += 1
+            if actual != expected:
+                mismatches += 1
+                print(f"document {doc}, return_all_candidates={return_all}:\n  legacy: {expected}\n  index:  {actual}")
+
+        window = deque(maxlen=args.window + 1)
+        for sent_no, tree in enumerate(trees):
+            window.append(sent_no)
+            last = len(window) - 1
+            expected = legacy_resolve_pronouns([words[i] for i in window], [strings[i] for i in window],
+                                               {last: pronouns.get(sent_no, [])}, analyser).get(last, {})
+            actual = hobbs.resolve_sentence(words[sent_no], [trees[i] for i in window], last,
+                                            pronouns.get(sent_no, []), analyser)
+            n_cases += 1
+            if actual != expected:
+                mismatches += 1
+                print(f"document {doc}, window ending at sentence {sent_no}:\n  legacy: {expected}\n  index:  {actual}")
+
+    print(f"{n_docs} documents, {n_cases} cases, {mismatches} mismatches")
+    print(f"  original nltk search            {legacy_seconds * 1e3:8.1f} ms")
+    print(f"  per-document candidate index    {indexed_seconds * 1e3:8.1f} ms")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measure how pronoun resolution time grows with document length.
+
+Documents mix sentences with and without NP candidates, and most pronouns have
+to search back across many sentences. With the per-document candidate index the
+time per sentence should stay flat as documents grow.
+
+Usage (from src/):
+    python -m benchmarks.resolution --lengths 250 1000 4000
+"""
+import argparse
+import random
+import time
+
+from hobbs import resolve_pronouns
+from MalayalamCorefResolver import MalayalamCorefResolver
+from morph_lexicon import MorphFeatureLexicon
+from tree_index import TreeIndex
+
+
+class _NoAnalyser:
+    def analyse(self, token):
+        return []
+
+
+def pronoun_heavy_document(n_sentences, seed=0):
+    rnd = random.Random(seed)
+    doc = []
+    for s in range(n_sentences):
+        # Only the first sentence offers NP chunks; the rest are verbs and pronouns
+        if s == 0:
+            sent = [(f"w{t}", "N__NN", "B-NP") for t in range(10)]
+        else:
+            sent = [(f"v{s}_{t}", "V__VM", "B-VGF") for t in range(8)]
+            for _ in range(rnd.randint(1, 3)):
+                sent.insert(rnd.randrange(len(sent) + 1), ("അത്", "PR__PRP", "B-VGF"))
+        doc.append(sent)
+    return doc
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--lengths", type=int, nargs="+", default=[250, 1000, 4000], help="Sentences per document")
+    args = arg_parser.parse_args()
+
+    lexicon = MorphFeatureLexicon(_NoAnalyser())
+    for n_sentences in args.lengths:
+        doc = pronoun_heavy_document(n_sentences)
+        words = [[tok for tok, _, _ in sent] for sent in doc]
+        pronouns = MalayalamCorefResolver.build_pronoun_map(doc)
+        n_pronouns = sum(len(indices) for indices in pronouns.values())
+        for return_all in (False, True):
+            trees = [TreeIndex.from_chunks(sent) for sent in doc]
+            start = time.perf_counter()
+            resolve_pronouns(words, trees, pronouns, lexicon, return_all_candidates=return_all)
+            seconds = time.perf_counter() - start
+            print(f"{n_sentences:6} sentences, {n_pronouns:6} pronouns, return_all_candidates={return_all!s:5}"
+                  f"  {seconds * 1e3:9.1f} ms  {seconds / n_sentences * 1e6:7.1f} us/sentence")
+
+
+if __name__ == "__main__":
+    main()
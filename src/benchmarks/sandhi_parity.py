@@ -0,0 +1,51 @@
+"""
+Check that the persistent sandhi splitter server splits text exactly like the
+original one-JVM-per-call ``StatisticalSandhiSplitter9`` run, and time both.
+
+Needs java on PATH and SandhiSplitterServer.class built next to the other
+splitter classes (see SandhiSplitterServer.java). Without a corpus, the paragraphs of the splitter's own plain text
+sample (sandhi_rules/testNtrainData999/mal9/plainntext9) are used.
+
+Usage (from src/):
+    python -m benchmarks.sandhi_parity [corpus.txt] --lines 200
+"""
+import argparse
+import time
+
+from external.devdath.wrapper import MalayalamShallowParser
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("corpus", nargs="?", help="Text file with one sentence or paragraph per line")
+    arg_parser.add_argument("--lines", type=int, default=200, help="Lines of the corpus to split")
+    args = arg_parser.parse_args()
+
+    legacy = MalayalamShallowParser()
+    server = MalayalamShallowParser(sandhi_workers=1)
+    corpus = args.corpus or legacy.sandhi_dir / "sandhi_rules" / "testNtrainData999" / "mal9" / "plainntext9"
+    with open(corpus, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()][:args.lines]
+
+    start = time.perf_counter()
+    expected = [legacy.sandhi_split(text) for text in texts]
+    legacy_seconds = time.perf_counter() - start
+
+    server.sandhi_pool.start()
+    start = time.perf_counter()
+    actual = [server.sandhi_split(text) for text in texts]
+    server_seconds = time.perf_counter() - start
+    server.close()
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, actual)) if a != b]
+    for i in mismatches[:5]:
+        print(f"line {i}:\n  legacy: {expected[i]!r}\n  server: {actual[i]!r}")
+    n_chars = sum(len(text) for text in texts)
+    print(f"{len(texts)} lines, {n_chars} characters, {len(mismatches)} mismatching lines")
+    print(f"  StatisticalSandhiSplitter9 per call  {legacy_seconds / len(texts) * 1e3:8.1f} ms/line")
+    print(f"  SandhiSplitterServer                 {server_seconds / len(texts) * 1e3:8.1f} ms/line")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Measure resolver cold-start time and resident memory per worker process.
+
+Cold start runs each step in a fresh interpreter: importing the resolver,
+constructing it (models are loaded lazily) and ``warmup()`` (everything loaded).
+
+Memory compares N workers that each build and warm up their own resolver
+(spawned) with N workers forked from a parent that warmed up once (preload).
+RSS counts shared pages in full; USS is memory private to the worker, and PSS
+splits shared pages between the processes using them.
+
+Usage (from src/):
+    python -m benchmarks.startup --runs 5 --workers 4
+"""
+import argparse
+import gc
+import multiprocessing
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+COLD_START = """
+import time
+start = time.perf_counter()
+from MalayalamCorefResolver import MalayalamCorefResolver
+imported = time.perf_counter()
+resolver = MalayalamCorefResolver()
+built = time.perf_counter()
+resolver.warmup(start_processes=False)
+warm = time.perf_counter()
+print(imported - start, built - imported, warm - built)
+"""
+
+# Tokens looked up in every worker, so the analyser is actually exercised
+TOKENS = ["പൂച്ച", "മേശ", "അവൻ", "അവൾ", "രാമു", "കേരളം", "വീട്", "കുട്ടി"]
+
+
+def _memory_kb():
+    """(RSS, PSS, USS) of this process in kB, from /proc/self/smaps_rollup."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Rss"], fields["Pss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+
+def _use(resolver):
+    for token in TOKENS:
+        resolver.morph_lexicon.get_feat(token)
+    resolver.split_sentences("രാമു വന്നു. അവൻ ചിരിച്ചു.")
+
+
+def _own_worker(results, done):
+    from MalayalamCorefResolver import MalayalamCorefResolver
+
+    resolver = MalayalamCorefResolver().warmup(start_processes=False)
+    _use(resolver)
+    results.put(_memory_kb())
+    done.wait()
+
+
+_preloaded = None
+
+
+def _forked_worker(results, done):
+    _use(_preloaded)
+    results.put(_memory_kb())
+    done.wait()
+
+
+def _measure_workers(context, target, n):
+    results = context.Queue()
+    done = context.Event()
+    workers = [context.Process(target=target, args=(results, done)) for _ in range(n)]
+    for w in workers:
+        w.start()
+    # All workers stay alive until every one has reported, so PSS reflects the sharing
+    samples = [results.get() for _ in workers]
+    done.set()
+    for w in workers:
+        w.join()
+    return [statistics.mean(column) / 1024 for column in zip(*samples)]
+
+
+def main():
+    global _preloaded
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters for the cold-start timing")
+    arg_parser.add_argument("--workers", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", COLD_START], cwd=SRC_DIR, capture_output=True, text=True,
+                             check=True)
+        timings.append([float(x) for x in out.stdout.split()])
+    imported, built, warm = (statistics.median(column) * 1e3 for column in zip(*timings))
+    print(f"Cold start (median of {args.runs} fresh interpreters)")
+    print(f"  import                {imported:8.1f} ms")
+    print(f"  construct (lazy)      {built:8.1f} ms")
+    print(f"  warmup()              {warm:8.1f} ms")
+
+    print(f"Memory per worker, {args.workers} workers (MiB)      RSS      PSS      USS")
+    rss, pss, uss = _measure_workers(multiprocessing.get_context("spawn"), _own_worker, args.workers)
+    print(f"  each worker loads its own models    {rss:8.1f} {pss:8.1f} {uss:8.1f}")
+
+    from MalayalamCorefResolver import MalayalamCorefResolver
+
+    _preloaded = MalayalamCorefResolver().warmup(start_processes=False)
+    gc.freeze()
+    rss, pss, uss = _measure_workers(multiprocessing.get_context("fork"), _forked_worker, args.workers)
+    print(f"  forked from a preloaded parent      {rss:8.1f} {pss:8.1f} {uss:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
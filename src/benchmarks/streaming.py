@@ -0,0 +1,75 @@
+"""
+Check that streaming resolution matches batch resolution on the same text.
+
+Each document is cut into pieces at random character offsets (and, separately,
+at its sentence ends), fed to ``find_coref_stream`` with an unbounded window,
+and compared sentence by sentence with ``find_coref`` on the whole text. The
+built-in documents include the cases where the sentence splitter merges
+sentences across a period: a one-word dateline, a one-word sentence in the
+middle of the text and a trailing abbreviation.
+
+Usage (from src/):
+    python -m benchmarks.streaming [corpus.txt] --cuts 50
+"""
+import argparse
+import random
+
+from MalayalamCorefResolver import MalayalamCorefResolver
+
+DOCUMENTS = [
+    # Dateline: split as "തിരുവനന്തപുരം. രാമൻ വീട്ടിൽ പോയി." + "അവൻ ഉറങ്ങി."
+    ["തിരുവനന്തപുരം.", "രാമൻ വീട്ടിൽ പോയി.", "അവൻ ഉറങ്ങി."],
+    ["രാമു വന്നു.", "കോഴിക്കോട്.", "അവൻ ചിരിച്ചു.", "പൂച്ച മേശയ്‌ക്ക് മുകളിൽ ഇരിക്കുന്നു.", "അത് ഉറങ്ങുന്നു."],
+    ["രാമു ഡോ.", "കൃഷ്ണനെ കണ്ടു.", "അവൻ ചിരിച്ചു.", "അത് നല്ലതാണ്"],
+]
+
+
+def _compare(resolver, text, pieces):
+    batch = resolver.find_coref(text)
+    streamed = list(resolver.find_coref_stream(pieces, window=None))
+    if [s["sentence"] for s in streamed] != batch["sentences"]:
+        return "sentences differ: {} vs {}".format([s["sentence"] for s in streamed], batch["sentences"])
+    coref = {s["sentence_id"]: s["coref"] for s in streamed if s["coref"]}
+    if coref != batch["coref"]:
+        return "coref differs: {} vs {}".format(coref, batch["coref"])
+    return None
+
+
+def random_pieces(text, rnd, max_cuts=8):
+    cuts = sorted(rnd.sample(range(1, len(text)), min(len(text) - 1, rnd.randint(0, max_cuts))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("corpus", nargs="?", help="Text file with one document per line")
+    arg_parser.add_argument("--cuts", type=int, default=50, help="Random cuttings per document")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    documents = [" ".join(sentences) for sentences in DOCUMENTS]
+    sentence_pieces = [[s + " " for s in sentences] for sentences in DOCUMENTS]
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            documents += [line.strip() for line in f if line.strip()]
+
+    resolver = MalayalamCorefResolver()
+    rnd = random.Random(args.seed)
+    failures = 0
+    for i, text in enumerate(documents):
+        cuttings = [random_pieces(text, rnd) for _ in range(args.cuts)]
+        if i < len(sentence_pieces):
+            cuttings.append(sentence_pieces[i])
+        for pieces in cuttings:
+            error = _compare(resolver, text, pieces)
+            if error:
+                failures += 1
+                print(f"document {i}, pieces {pieces}: {error}")
+                break
+    print(f"{len(documents)} documents, {args.cuts} random cuttings each: {failures} mismatching documents")
+    resolver.close()
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Check that MalayalamTokenizer produces exactly the tokens of
+``tokenize_ind(lang="mal")`` and compare tokenization cost per sentence.
+
+Usage (from src/):
+    python -m benchmarks.tokenizer [corpus.txt ...] --random 20000
+
+Every corpus file holds one sentence per line. ``--random`` adds generated
+sentences mixing Malayalam with digits, Latin text, punctuation, quotes,
+hyphens, repeated dots and virams and zero-width characters.
+"""
+import argparse
+import random
+import time
+
+from external.irtokz.malayalam import MalayalamTokenizer
+from external.irtokz.tokenise import tokenize_ind
+
+WORDS = ["പൂച്ച", "മേശയ്‌ക്ക്", "മുകളിൽ", "ഇരിക്കുന്നു", "അത്", "അവൻ", "രാമു", "ഉറങ്ങുന്നു", "കേരളം",
+         "൧൨൩", "൲", "൳", "123", "3.5", "Mr.", "Dr.", "e.g.", "A.", "no.", "Kochi", "don't", "John's",
+         "1990's", "it’s", "ശ്രീ‍", " ", "​", "﻿"]
+PUNCT = [".", ",", "?", "!", "...", "..", "।", "।।", "॥॥", "-", "--", "—", "'", "''", "’", "\"", "“", "”",
+         "(", ")", ":", ";", "/", "%", "₹", "½", "×", "\t", "\x07", "­", "DOTMULTI"]
+
+
+def random_sentences(n, seed=0):
+    rnd = random.Random(seed)
+    sentences = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rnd.randint(1, 25)):
+            parts.append(rnd.choice(WORDS) if rnd.random() < 0.7 else rnd.choice(PUNCT))
+            parts.append(" " if rnd.random() < 0.8 else "")
+        sentences.append("".join(parts))
+    return sentences
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("corpus", nargs="*", help="Text files with one sentence per line")
+    arg_parser.add_argument("--random", type=int, default=20000, help="Number of generated sentences to add")
+    args = arg_parser.parse_args()
+
+    sentences = []
+    for path in args.corpus:
+        with open(path, encoding="utf-8") as f:
+            sentences.extend(line.rstrip("\n") for line in f)
+    sentences.extend(random_sentences(args.random))
+
+    start = time.perf_counter()
+    for s in sentences:
+        tokenize_ind(lang="mal", split_sen=False).tokenize(s)
+    per_call_seconds = time.perf_counter() - start
+
+    reference_tokenizer = tokenize_ind(lang="mal", split_sen=False)
+    start = time.perf_counter()
+    reference = [reference_tokenizer.tokenize(s).split() for s in sentences]
+    shared_seconds = time.perf_counter() - start
+
+    tokenizer = MalayalamTokenizer()
+    start = time.perf_counter()
+    fast = tokenizer.tokenize_many(sentences)
+    fast_seconds = time.perf_counter() - start
+
+    mismatches = [s for s, a, b in zip(sentences, reference, fast) if a != b]
+    print(f"{len(sentences)} sentences, token-identical: {not mismatches}")
+    for s in mismatches[:10]:
+        print(f"  mismatch: {s!r}")
+    for name, seconds in (("tokenize_ind built per sentence", per_call_seconds),
+                          ("shared tokenize_ind", shared_seconds),
+                          ("MalayalamTokenizer", fast_seconds)):
+        print(f"  {name:32} {seconds / len(sentences) * 1e6:8.1f} us/sentence")
+
+
+if __name__ == "__main__":
+    main()
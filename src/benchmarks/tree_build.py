@@ -0,0 +1,58 @@
+"""
+Compare the cost of building Hobbs trees for a long document through the
+bracketed-string path (list_to_parsable_string + nltk.Tree.fromstring) and
+directly from chunk tuples (TreeIndex.from_chunks).
+
+Usage (from src/):
+    python -m benchmarks.tree_build --sentences 2000 --tokens 40
+"""
+import argparse
+import random
+import time
+
+from nltk import Tree
+
+from MalayalamCorefResolver import MalayalamCorefResolver
+from tree_index import TreeIndex
+
+POS_TAGS = ["N__NN", "N__NNP", "PR__PRP", "V__VM", "V__VAUX", "DM__DMD", "RD__PUNC", "QT__QTC", "N__NST"]
+
+
+def synthetic_document(n_sentences, n_tokens, seed=0):
+    rnd = random.Random(seed)
+    doc = []
+    for s in range(n_sentences):
+        sent = []
+        for t in range(n_tokens):
+            chunk = "B-NP" if t == 0 or rnd.random() < 0.4 else "I-NP"
+            sent.append((f"w{s}_{t}", rnd.choice(POS_TAGS), chunk))
+        doc.append(sent)
+    return doc
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sentences", type=int, default=2000)
+    arg_parser.add_argument("--tokens", type=int, default=40, help="Tokens per sentence")
+    args = arg_parser.parse_args()
+
+    doc = synthetic_document(args.sentences, args.tokens)
+
+    start = time.perf_counter()
+    via_string = [TreeIndex.from_tree(Tree.fromstring(s))
+                  for s in MalayalamCorefResolver.list_to_parsable_string(doc)]
+    string_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    direct = [TreeIndex.from_chunks(sent) for sent in doc]
+    direct_seconds = time.perf_counter() - start
+
+    same = all(a.labels == b.labels and a.parent == b.parent and a.leaves == b.leaves
+               for a, b in zip(via_string, direct))
+    print(f"{args.sentences} sentences x {args.tokens} tokens, identical trees: {same}")
+    print(f"  bracketed string + nltk parse  {string_seconds * 1e3:10.1f} ms")
+    print(f"  from_chunks                    {direct_seconds * 1e3:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Antecedent candidates of a document, precomputed once for the Hobbs search.
+
+For every sentence and every label the search asks for ("NP", "NN",
+"LOCATIVE"), ``SentenceCandidates`` keeps the matching nodes in breadth-first
+order and the NP-like nodes in preorder. ``CandidateIndex`` adds, per label, the
+nearest earlier sentence holding a match and memoized morphological features of
+candidate heads. Queries are then list walks and bisections instead of fresh
+breadth-first searches, so resolving a document costs time linear in its length.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from tree_index import TreeIndex
+
+CANDIDATE_LABELS = ("NP", "NN", "LOCATIVE")
+NOMINAL_LABELS = {"PRP", "NNPS", "NNP", "NNS", "NN"}
+
+
+class SentenceCandidates:
+    """
+    Candidate nodes of one sentence tree, per label.
+
+    Built once per TreeIndex and kept on it (``tree.candidates``), so sentences
+    shared by several documents or windows are only indexed once.
+    """
+
+    def __init__(self, tree: TreeIndex):
+        self.tree = tree
+        # Nodes whose label contains the search label, breadth-first
+        self.matches: Dict[str, List[int]] = {}
+        # Matching nodes that are not themselves nominal POS nodes, in preorder
+        self.np_nodes: Dict[str, List[int]] = {}
+        for label in CANDIDATE_LABELS:
+            self.matches[label] = []
+            self.np_nodes[label] = []
+        for node in tree.bfs_order:
+            node_label = tree.labels[node]
+            for label in CANDIDATE_LABELS:
+                if label in node_label:
+                    self.matches[label].append(node)
+        for node, node_label in enumerate(tree.labels):
+            if node_label in NOMINAL_LABELS:
+                continue
+            for label in CANDIDATE_LABELS:
+                if label in node_label:
+                    self.np_nodes[label].append(node)
+
+    @classmethod
+    def of(cls, tree: TreeIndex) -> "SentenceCandidates":
+        if tree.candidates is None:
+            tree.candidates = cls(tree)
+        return tree.candidates
+
+    def _index(self, label: str):
+        if label not in self.matches:
+            # Labels outside CANDIDATE_LABELS are indexed on first use
+            tree = self.tree
+            self.matches[label] = [n for n in tree.bfs_order if label in tree.labels[n]]
+            self.np_nodes[label] = [n for n, node_label in enumerate(tree.labels)
+                                    if label in node_label and node_label not in NOMINAL_LABELS]
+
+    def first(self, label: str) -> Optional[int]:
+        """First node in breadth-first order whose label contains ``label``."""
+        self._index(label)
+        matches = self.matches[label]
+        return matches[0] if matches else None
+
+    def has_intervening_np(self, pos: int, proposal: int, label: str) -> bool:
+        """At least three NP-like nodes under ``pos``, the first of them before ``proposal``."""
+        self._index(label)
+        np_nodes = self.np_nodes[label]
+        lo = bisect_left(np_nodes, pos)
+        hi = bisect_left(np_nodes, self.tree.end[pos], lo)
+        return hi - lo >= 3 and np_nodes[lo] < proposal
+
+    def left_of(self, pos: int, path: List[int], label: str, check: bool) -> Optional[int]:
+        """
+        First match under ``pos`` in breadth-first order that lies left of ``path[0]``
+        and off the path, optionally requiring an intervening NP.
+        """
+        self._index(label)
+        on_path = set(path)
+        end = min(self.tree.end[pos], path[0])
+        for p in self.matches[label]:
+            if pos <= p < end and p not in on_path:
+                if not check or self.has_intervening_np(pos, p, label):
+                    return p
+        return None
+
+
+class CandidateIndex:
+    """
+    Candidates of consecutive sentences, e.g. one document or a streaming window.
+
+    Args:
+        trees: Sentence trees in document order; more can be added with ``append``.
+        feature_lookup: Maps a token to its morphological feature bundle. Results
+            are memoized for the lifetime of the index.
+    """
+
+    def __init__(self, trees: Iterable[TreeIndex] = (), feature_lookup: Optional[Callable] = None):
+        self.sentences: List[SentenceCandidates] = []
+        self._feature_lookup = feature_lookup
+        self._features: Dict[str, Dict[str, str]] = {}
+        self._previous: Dict[str, List[int]] = {}
+        for tree in trees:
+            self.append(tree)
+
+    def append(self, tree: TreeIndex):
+        self.sentences.append(SentenceCandidates.of(tree))
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def tree(self, sentence_id: int) -> TreeIndex:
+        return self.sentences[sentence_id].tree
+
+    def first_match(self, sentence_id: int, label: str) -> Tuple[Optional[TreeIndex], Optional[int]]:
+        """First breadth-first match of ``label`` in sentence ``sentence_id`` as (tree, node), or (None, None)."""
+        node = self.sentences[sentence_id].first(label)
+        if node is None:
+            return None, None
+        return self.sentences[sentence_id].tree, node
+
+    def previous_with_match(self, sentence_id: int, label: str) -> int:
+        """Closest sentence before ``sentence_id`` holding a ``label`` match, or -1."""
+        previous = self._previous.setdefault(label, [])
+        # Extended incrementally, so every sentence is looked at once per label
+        while len(previous) <= sentence_id:
+            k = len(previous)
+            if k == 0:
+                previous.append(-1)
+            else:
+                previous.append(k - 1 if self.sentences[k - 1].first(label) is not None else previous[k - 1])
+        return previous[sentence_id]
+
+    def features(self, token: str) -> Dict[str, str]:
+        """Morphological features of ``token``, looked up once per index."""
+        feat = self._features.get(token)
+        if feat is None:
+            feat = self._features[token] = self._feature_lookup(token)
+        return feat
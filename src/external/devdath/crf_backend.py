@@ -0,0 +1,165 @@
+import subprocess
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from instrumentation import NULL_METRICS, Metrics
+
+CRF_BACKENDS = ("auto", "inprocess", "subprocess")
+
+
+class SubprocessCRFTagger:
+    """
+    Tags sequences by running the ``crf_test`` binary, loading the model on every call.
+    """
+
+    def __init__(self, model_path: Path, name: str, metrics: Optional[Metrics] = None):
+        self.model_path = model_path
+        self.name = name
+        self.metrics = metrics or NULL_METRICS
+
+    def load(self):
+        """Nothing to preload; ``crf_test`` reads the model on every call."""
+
+    def tag(self, crf_inputs: List[str]) -> List[List[List[str]]]:
+        """
+        Tag many sequences with a single ``crf_test`` invocation.
+
+        Args:
+            crf_inputs: One feature block per sequence (rows separated by newlines).
+
+        Returns:
+            For every input block, the list of output rows split into columns
+            (input columns followed by the predicted tag). Empty blocks yield an
+            empty list without being sent to CRF++.
+        """
+        results = [[] for _ in crf_inputs]
+        non_empty = [i for i, block in enumerate(crf_inputs) if block.strip()]
+        if not non_empty:
+            return results
+
+        # CRF++ treats blank lines as sequence boundaries
+        crf_input = "\n\n".join(crf_inputs[i].strip("\n") for i in non_empty) + "\n"
+
+        # With no input file crf_test reads stdin, so nothing touches the disk
+        result = subprocess.run(["crf_test", "-m", str(self.model_path)], input=crf_input, encoding="utf-8",
+                                capture_output=True)
+
+        self.metrics.count("subprocess_spawns", tool="crf_test")
+        self.metrics.count("external_bytes_written", len(crf_input.encode("utf-8")), tool="crf_test")
+        self.metrics.count("external_bytes_read", len(result.stdout.encode("utf-8")), tool="crf_test")
+
+        if result.returncode != 0:
+            raise RuntimeError(f"{self.name} failed with exit code {result.returncode}:\n{result.stderr}")
+
+        sequences = []
+        current = []
+        for line in result.stdout.splitlines():
+            if not line.strip():
+                if current:
+                    sequences.append(current)
+                    current = []
+                continue
+            current.append(line.split("\t"))
+        if current:
+            sequences.append(current)
+
+        if len(sequences) != len(non_empty):
+            raise RuntimeError(f"{self.name} returned {len(sequences)} sequences for {len(non_empty)} inputs")
+
+        for i, rows in zip(non_empty, sequences):
+            results[i] = rows
+        return results
+
+
+class InProcessCRFTagger:
+    """
+    Tags sequences with the CRF++ Python bindings (``CRFPP`` module).
+
+    The model is loaded once, on first use or by ``load``, and Viterbi decoding
+    runs in-process, so a call costs no process launch or model load. Output
+    matches ``crf_test`` since both use the same CRF++ library. With
+    ``fall_back``, a model the bindings fail to load is run through ``crf_test``
+    instead.
+    """
+
+    def __init__(self, model_path: Path, name: str, metrics: Optional[Metrics] = None, fall_back: bool = False):
+        import CRFPP
+
+        self.model_path = model_path
+        self.name = name
+        self.metrics = metrics or NULL_METRICS
+        # CRF++ splits its argument string on whitespace
+        if " " in str(model_path):
+            raise ValueError(f"CRF++ cannot load a model path containing spaces: {model_path}")
+        self._crfpp = CRFPP
+        self._tagger = None
+        self._fall_back = fall_back
+        self._subprocess: Optional[SubprocessCRFTagger] = None
+        # A CRFPP.Tagger holds per-sequence state and is not thread-safe
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the model now instead of on the first ``tag`` call."""
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        if self._tagger is not None or self._subprocess is not None:
+            return
+        try:
+            self._tagger = self._crfpp.Tagger(f"-m {self.model_path}")
+        except RuntimeError as e:
+            if self._fall_back:
+                self._subprocess = SubprocessCRFTagger(self.model_path, self.name, self.metrics)
+                return
+            raise RuntimeError(f"{self.name} could not load {self.model_path}: {e}") from e
+
+    def tag(self, crf_inputs: List[str]) -> List[List[List[str]]]:
+        """Same contract as ``SubprocessCRFTagger.tag``."""
+        with self._lock:
+            self._load()
+        if self._subprocess is not None:
+            return self._subprocess.tag(crf_inputs)
+
+        results = []
+        with self._lock:
+            for block in crf_inputs:
+                rows = [line.split("\t") for line in block.splitlines() if line.strip()]
+                if not rows:
+                    results.append([])
+                    continue
+
+                self._tagger.clear()
+                for cols in rows:
+                    self._tagger.add("\t".join(cols))
+                if not self._tagger.parse():
+                    raise RuntimeError(f"{self.name} failed: {self._tagger.what()}")
+
+                results.append([cols + [self._tagger.y2(i)] for i, cols in enumerate(rows)])
+        return results
+
+
+def load_crf_tagger(model_path: Path, name: str, backend: str = "auto", metrics: Optional[Metrics] = None):
+    """
+    Create a CRF tagger for ``model_path``.
+
+    Args:
+        backend: "inprocess" requires the CRF++ Python bindings, "subprocess"
+            shells out to ``crf_test``, and "auto" picks in-process decoding when
+            the bindings are installed and can load the model, and falls back to
+            ``crf_test`` otherwise. The model is only loaded on first use, so a
+            model the bindings reject switches to ``crf_test`` then.
+    """
+    if backend not in CRF_BACKENDS:
+        raise ValueError(f"Unknown CRF backend {backend!r}, expected one of {CRF_BACKENDS}")
+
+    if backend == "subprocess":
+        return SubprocessCRFTagger(model_path, name, metrics)
+    if backend == "inprocess":
+        return InProcessCRFTagger(model_path, name, metrics)
+
+    try:
+        return InProcessCRFTagger(model_path, name, metrics, fall_back=True)
+    except (ImportError, ValueError):
+        return SubprocessCRFTagger(model_path, name, metrics)
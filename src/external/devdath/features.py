@@ -0,0 +1,44 @@
+"""
+Character-level CRF++ features shared by POS tagging and chunking.
+
+Adapted from featurise_test.py of the original shallow parser. A token's row is
+the token, its first 3 prefixes, its 7 longest suffixes (padded with "NONE")
+and its length, tab separated. Chunking uses the same row followed by the POS
+tag.
+"""
+
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+PREFIXES = 3
+SUFFIXES = 7
+PAD = "NONE"
+
+
+@lru_cache(maxsize=1 << 16)
+def token_features(token: str) -> str:
+    """Tab separated POS feature row of ``token`` (memoized)."""
+    length = len(token)
+    prefixes = [token[:i] for i in range(1, min(length, PREFIXES) + 1)]
+    suffixes = [token[i:] for i in range(min(length, SUFFIXES))]
+    prefixes += [PAD] * (PREFIXES - len(prefixes))
+    suffixes += [PAD] * (SUFFIXES - len(suffixes))
+    return "\t".join([token] + prefixes + suffixes + [str(length)])
+
+
+def pos_input(tokens: Iterable[str]) -> str:
+    """CRF++ POS tagger input for one sentence; empty tokens are skipped."""
+    return "\n".join(token_features(token) for token in (t.strip() for t in tokens) if token)
+
+
+def chunk_input(pos_tagged: Iterable[Tuple[str, str]]) -> str:
+    """CRF++ chunker input for one sentence of (token, POS_tag) pairs."""
+    return "\n".join(f"{token_features(token)}\t{pos}" for token, pos in pos_tagged)
+
+
+def chunk_input_from_rows(pos_rows: List[List[str]]) -> str:
+    """
+    Chunker input from POS tagger output rows, which already hold the feature
+    columns followed by the predicted tag, so no token is featurized twice.
+    """
+    return "\n".join("\t".join(cols) for cols in pos_rows)
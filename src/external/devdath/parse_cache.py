@@ -0,0 +1,145 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tiered_cache import TieredCache
+
+# Bump when parsing code not fingerprinted through MalayalamShallowParser.model_files() changes its output
+CACHE_VERSION = "3"
+
+ParsedSentence = List[Tuple[str, str, str]]
+
+_SPACE_RUN = re.compile(" +")
+
+
+def fingerprint_files(paths: Iterable[Path]) -> str:
+    """Hash the contents of every model and rule file that shallow parsing depends on."""
+    digest = hashlib.sha256(CACHE_VERSION.encode("utf-8"))
+    for path in sorted(Path(p) for p in paths):
+        digest.update(str(path.name).encode("utf-8"))
+        if not path.exists():
+            digest.update(b"\0missing")
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def normalize_sentence(text: str) -> str:
+    """
+    Strip and collapse runs of plain ASCII spaces, which do not change the parse.
+
+    Tabs, newlines and other Unicode spaces are kept as they are: the sandhi
+    splitter copies them into its output and they can change the tokens.
+    """
+    return _SPACE_RUN.sub(" ", text.strip(" "))
+
+
+class ShallowParseCache(TieredCache):
+    """
+    Cache of (token, POS_tag, CHUNK_tag) lists per sentence.
+
+    Entries are keyed by a hash of the normalized sentence text and the model
+    fingerprint, so changing any model or rule file invalidates every entry.
+    An in-memory LRU tier sits in front of an optional sqlite tier, which is
+    trimmed to ``max_store_bytes`` by evicting least recently used entries.
+    """
+
+    def __init__(self, fingerprint: str, maxsize: int = 10000, store_path: Optional[Path] = None,
+                 max_store_bytes: int = 1 << 30):
+        super().__init__(maxsize, store_path)
+        self.fingerprint = fingerprint
+        self.max_store_bytes = max_store_bytes
+
+    def key(self, sentence: str) -> str:
+        return hashlib.sha256(f"{self.fingerprint}\0{normalize_sentence(sentence)}".encode("utf-8")).hexdigest()
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("CREATE TABLE IF NOT EXISTS parses "
+                     "(key TEXT PRIMARY KEY, value TEXT, size INTEGER, last_used REAL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS parses_last_used ON parses (last_used)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('bytes', 0)")
+
+    def get_many(self, sentences: List[str]) -> List[Optional[ParsedSentence]]:
+        """Return the cached parse of each sentence, or None where there is none."""
+        keys = [self.key(s) for s in sentences]
+        results: List[Optional[ParsedSentence]] = []
+        store_keys = []
+        for key in keys:
+            parsed = self._recall(key)
+            if parsed is not None:
+                self.hits += 1
+            else:
+                store_keys.append(key)
+            results.append(parsed)
+
+        conn = self._connection()
+        if conn is None or not store_keys:
+            self.misses += len(store_keys)
+            return results
+
+        found = {}
+        # Stay well below sqlite's limit on bound parameters
+        for start in range(0, len(store_keys), 500):
+            batch = store_keys[start:start + 500]
+            for key, value in conn.execute(
+                    f"SELECT key, value FROM parses WHERE key IN ({','.join('?' * len(batch))})", batch):
+                found[key] = [tuple(row) for row in json.loads(value)]
+        if found:
+            # Only steers eviction, so it is skipped while another process writes
+            now = time.time()
+            self._write(lambda conn: conn.executemany("UPDATE parses SET last_used = ? WHERE key = ?",
+                                                      ((now, key) for key in found)))
+
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                parsed = found.get(key)
+                if parsed is not None:
+                    self.store_hits += 1
+                    self._remember(key, parsed)
+                    results[i] = parsed
+                else:
+                    self.misses += 1
+        return results
+
+    def put_many(self, sentences: List[str], parses: List[ParsedSentence]):
+        items = {self.key(s): parsed for s, parsed in zip(sentences, parses)}
+        for key, parsed in items.items():
+            self._remember(key, parsed)
+
+        if items:
+            self._write(lambda conn: self._store_put(conn, items))
+
+    def _store_put(self, conn: sqlite3.Connection, items: Dict[str, ParsedSentence]):
+        now = time.time()
+        added = 0
+        for key, parsed in items.items():
+            value = json.dumps(parsed, ensure_ascii=False)
+            size = len(key) + len(value.encode("utf-8"))
+            old = conn.execute("SELECT size FROM parses WHERE key = ?", (key,)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO parses VALUES (?, ?, ?, ?)", (key, value, size, now))
+            added += size - (old[0] if old else 0)
+        conn.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'", (added,))
+        self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+        if total <= self.max_store_bytes:
+            return
+        # Trim to 90% so eviction does not run on every insert once the store is full
+        target = int(self.max_store_bytes * 0.9)
+        freed = 0
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM parses ORDER BY last_used"):
+            if total - freed <= target:
+                break
+            evicted.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM parses WHERE key = ?", evicted)
+        conn.execute("UPDATE meta SET value = value - ? WHERE name = 'bytes'", (freed,))
@@ -0,0 +1,157 @@
+import os
+import queue
+import subprocess
+import threading
+from pathlib import Path
+from typing import Optional
+
+from instrumentation import NULL_METRICS, Metrics
+
+
+class SandhiSplitterWorker:
+    """
+    A long-lived ``SandhiSplitterServer`` JVM.
+
+    The rule and training files are loaded once when the process starts. Sentences
+    are then exchanged over stdin/stdout as length-prefixed UTF-8 frames, so no
+    input, output or config file is written to disk.
+    """
+
+    def __init__(self, sandhi_dir: Path, config_path: Path, metrics: Optional[Metrics] = None):
+        self.sandhi_dir = sandhi_dir
+        self.config_path = config_path
+        self.metrics = metrics or NULL_METRICS
+        self.process: Optional[subprocess.Popen] = None
+        self.start()
+
+    def start(self):
+        if not (self.sandhi_dir / "SandhiSplitterServer.class").exists():
+            raise RuntimeError(
+                f"SandhiSplitterServer.class not found in {self.sandhi_dir}. "
+                "Build it with: javac -source 8 -target 8 -cp . SandhiSplitterServer.java")
+
+        self.process = subprocess.Popen(
+            ["java", "-cp", str(self.sandhi_dir), "SandhiSplitterServer", str(self.config_path)],
+            cwd=self.sandhi_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.metrics.count("subprocess_spawns", tool="java")
+
+        ready = self.process.stdout.readline()
+        if ready.strip() != b"READY":
+            self.close()
+            raise RuntimeError("Sandhi splitter server failed to start")
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def split(self, text: str) -> str:
+        payload = text.encode("utf-8")
+        self.process.stdin.write(f"{len(payload)}\n".encode("ascii") + payload)
+        self.process.stdin.flush()
+
+        header = self.process.stdout.readline()
+        if not header:
+            raise RuntimeError(f"Sandhi splitter server exited with code {self.process.poll()}")
+        output = self.process.stdout.read(int(header))
+        self.metrics.count("external_bytes_written", len(payload), tool="java")
+        self.metrics.count("external_bytes_read", len(output), tool="java")
+        return output.decode("utf-8")
+
+    def detach(self):
+        """Drop a process inherited through fork() without stopping it; it belongs to the parent."""
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.stdout.close()
+            self.process = None
+
+    def kill(self):
+        """Stop the process at once, e.g. when an exchange was cut short and its reply is unread."""
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+class SandhiSplitterPool:
+    """
+    Thread-safe pool of ``SandhiSplitterWorker`` processes.
+
+    Each call borrows an idle worker. A worker that has died, or fails while
+    handling a sentence, is replaced and the sentence is retried once on the
+    fresh worker. A worker whose exchange is interrupted by any other exception
+    (a timeout signal, KeyboardInterrupt) is killed before it is returned, so
+    the next call restarts it instead of reading a stale reply.
+
+    Processes are started on first use (or by ``start``). A pool copied into a
+    forked child starts its own processes instead of sharing the parent's.
+    """
+
+    def __init__(self, sandhi_dir: Path, config_path: Path, size: int = 1, metrics: Optional[Metrics] = None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.sandhi_dir = sandhi_dir
+        self.config_path = config_path
+        self.size = size
+        self.metrics = metrics
+        self._idle = queue.Queue()
+        self._workers = []
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker processes unless this process already has them."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            for worker in self._workers:
+                worker.detach()
+            self._idle = queue.Queue()
+            self._workers = []
+            for _ in range(self.size):
+                worker = SandhiSplitterWorker(self.sandhi_dir, self.config_path, self.metrics)
+                self._workers.append(worker)
+                self._idle.put(worker)
+            self._pid = os.getpid()
+
+    @staticmethod
+    def _restart(worker: SandhiSplitterWorker):
+        worker.close()
+        worker.start()
+
+    def split(self, text: str) -> str:
+        self.start()
+        worker = self._idle.get()
+        try:
+            if not worker.is_alive():
+                self._restart(worker)
+            try:
+                return worker.split(text)
+            except (OSError, ValueError, RuntimeError):
+                self._restart(worker)
+                return worker.split(text)
+        except BaseException:
+            worker.kill()
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        for worker in self._workers:
+            if self._pid == os.getpid():
+                worker.close()
+            else:
+                worker.detach()
+        self._workers = []
+        self._pid = None
@@ -0,0 +1,153 @@
+import java.io.BufferedInputStream;
+import java.io.BufferedReader;
+import java.io.BufferedWriter;
+import java.io.ByteArrayOutputStream;
+import java.io.FileInputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.OutputStreamWriter;
+import java.io.PrintStream;
+import java.io.StringWriter;
+import java.nio.charset.StandardCharsets;
+
+/*
+ * Long-lived variant of StatisticalSandhiSplitter9.main.
+ *
+ * The training file is read once at startup, after which sentences are
+ * exchanged over stdin/stdout using length-prefixed UTF-8 frames:
+ *
+ *   request:  <number of bytes>\n<utf-8 text>
+ *   response: <number of bytes>\n<utf-8 split text>
+ *
+ * "READY" is written once training has finished. All diagnostic output of the
+ * original splitter is discarded and every file the batch program used to write
+ * (pattern file, word level outputs, error/accuracy logs, dummy training file)
+ * is redirected to the null device, so several servers can share one install.
+ *
+ * Build with: javac -source 8 -target 8 -cp . SandhiSplitterServer.java
+ */
+public class SandhiSplitterServer {
+
+	/* Discards everything written to it (OutputStream.nullOutputStream needs Java 11) */
+	static class NullOutputStream extends OutputStream{
+		public void write(int b){}
+		public void write(byte[] b,int off,int len){}
+	}
+
+	static BufferedWriter discardWriter(){
+		return new BufferedWriter(new OutputStreamWriter(new NullOutputStream(),StandardCharsets.UTF_8));
+	}
+
+	static String nullDevice(){
+		if(System.getProperty("os.name").toLowerCase().startsWith("windows"))
+			return "NUL";
+		return "/dev/null";
+	}
+
+	static String readHeader(InputStream in) throws IOException{
+		ByteArrayOutputStream header=new ByteArrayOutputStream();
+		int b;
+		while((b=in.read())!=-1){
+			if(b=='\n')
+				return header.toString("US-ASCII").trim();
+			header.write(b);
+		}
+		return null;
+	}
+
+	static byte[] readFully(InputStream in,int size) throws IOException{
+		byte[] data=new byte[size];
+		int offset=0;
+		while(offset<size){
+			int n=in.read(data,offset,size-offset);
+			if(n==-1)
+				throw new IOException("Unexpected end of stream");
+			offset+=n;
+		}
+		return data;
+	}
+
+	static void writeFrame(OutputStream out,String text) throws IOException{
+		byte[] data=text.getBytes(StandardCharsets.UTF_8);
+		out.write((data.length+"\n").getBytes(StandardCharsets.US_ASCII));
+		out.write(data);
+		out.flush();
+	}
+
+	/* Same word segmentation as the read loop in StatisticalSandhiSplitter9.main */
+	static String split(String text){
+		BufferedWriter discard=discardWriter();
+		StringWriter plainText=new StringWriter();
+		BufferedWriter oaw_w_plaintext=new BufferedWriter(plainText);
+		try{
+			String word="";
+			for(int k=0;k<text.length();k++){
+				char character=text.charAt(k);
+				if(character==' '||character=='.'||character=='\n'||character==','||character=='\t'){
+					word=word.trim();
+					if(!word.equals("")){
+						StatisticalSandhiSplitter9.getSplitPoints9(word,discard,discard,oaw_w_plaintext);
+						word="";
+					}
+					oaw_w_plaintext.write(character);
+					continue;
+				}
+				word=word+character;
+			}
+			oaw_w_plaintext.flush();
+		}catch(IOException e){
+			e.printStackTrace();
+		}
+		return plainText.toString();
+	}
+
+	public static void main(String[] a){
+		PrintStream protocolOut=System.out;
+		System.setOut(new PrintStream(new NullOutputStream()));
+
+		ConfigurationSettings settings=ConfigurationSettings.getConfigurationSettings();
+		settings.readConfig(a[0]);
+		String nullDevice=nullDevice();
+		settings.setWordlevleoutput_with_splitpoints(nullDevice);
+		settings.setWordleveloutput_without_splitpoints(nullDevice);
+		settings.setPlain_text_output(nullDevice);
+		settings.setPatternfile(nullDevice);
+		settings.ErrorDetailsFileC=nullDevice;
+		settings.AccruracteSplit9=nullDevice;
+		settings.DummyTrainingFileRecord=nullDevice;
+		TrainingFileCreator.DummyTrainingFile=nullDevice;
+
+		try{
+			CCResult9.getInstance().parseTestFile9(settings.getInputDataTestDetails9());
+		}catch(IOException e1){
+			System.err.println("Wrongly Set Test Details File");
+			System.exit(1);
+		}
+
+		try{
+			BufferedReader reader=new BufferedReader(new InputStreamReader(new FileInputStream(settings.getTrainingfile()),StandardCharsets.UTF_8));
+			BufferedWriter discard=discardWriter();
+			String line;
+			while((line=reader.readLine())!=null){
+				StatisticalSandhiSplitter9.processWordDetails(StatisticalSandhiSplitter9.processWords9(line),discard);
+			}
+			reader.close();
+
+			InputStream in=new BufferedInputStream(System.in);
+			protocolOut.print("READY\n");
+			protocolOut.flush();
+			String header;
+			while((header=readHeader(in))!=null){
+				if(header.equals(""))
+					continue;
+				byte[] payload=readFully(in,Integer.parseInt(header));
+				writeFrame(protocolOut,split(new String(payload,StandardCharsets.UTF_8)));
+			}
+		}catch(IOException e){
+			e.printStackTrace();
+			System.exit(1);
+		}
+	}
+}
@@ -1,9 +1,14 @@
 import subprocess
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-from external.irtokz.tokenise import tokenize_ind
+from external.devdath.crf_backend import load_crf_tagger
+from external.devdath.features import chunk_input, chunk_input_from_rows, pos_input
+from external.devdath.parse_cache import ShallowParseCache, fingerprint_files
+from external.devdath.sandhi_server import SandhiSplitterPool
+from external.irtokz.malayalam import get_malayalam_tokenizer
+from instrumentation import NULL_METRICS, Metrics
 
 
 class MalayalamShallowParser:
@@ -14,16 +19,90 @@ class MalayalamShallowParser:
     https://github.com/Devadath/Malayalam-Shallow-Parser
     """
 
-    def __init__(self):
+    def __init__(self, sandhi_workers: int = 0, crf_backend: str = "auto", parse_cache_size: int = 0,
+                 parse_cache_path: Optional[Path] = None, parse_cache_max_bytes: int = 1 << 30,
+                 metrics: Optional[Metrics] = None):
+        """
+        Args:
+            sandhi_workers: Number of persistent sandhi splitter processes to keep
+                running; the sentences of a batch are split on all of them at
+                once. 0 launches a new JVM for every sentence.
+            crf_backend: "inprocess" (CRF++ Python bindings), "subprocess"
+                (``crf_test``) or "auto" to use the bindings when installed.
+            parse_cache_size: Sentences kept in the in-memory parse cache. The cache
+                is disabled when this is 0 and no ``parse_cache_path`` is given.
+            parse_cache_path: Optional sqlite file for the on-disk parse cache tier.
+            parse_cache_max_bytes: Size the on-disk tier is trimmed to.
+            metrics: Optional Metrics collecting stage timings and external tool counters.
+        """
+        self.metrics = metrics or NULL_METRICS
         base_dir = Path(__file__).resolve().parent.resolve().parent / "devdath"
         models_dir = base_dir / "models"
         self.pos_model_path = models_dir / "devdath_pos.model"
         self.chunk_model_path = models_dir / "devdath_chunk.model"
+        self.pos_tagger = load_crf_tagger(self.pos_model_path, "CRF++", crf_backend, self.metrics)
+        self.chunk_tagger = load_crf_tagger(self.chunk_model_path, "CRF++ Chunking", crf_backend, self.metrics)
         self.sandhi_dir = base_dir / "sandhi_splitter"
         self.sandhi_config = self.sandhi_dir / "config"
+        self.sandhi_pool = SandhiSplitterPool(self.sandhi_dir, self.sandhi_config,
+                                              sandhi_workers, self.metrics) if sandhi_workers else None
+        self.parse_cache = None
+        if parse_cache_size or parse_cache_path:
+            self.parse_cache = ShallowParseCache(fingerprint_files(self.model_files()), maxsize=parse_cache_size,
+                                                 store_path=parse_cache_path, max_store_bytes=parse_cache_max_bytes)
+
+    def warmup(self, start_processes: bool = True):
+        """
+        Load the tokenizer and CRF models now rather than on first use.
+
+        Args:
+            start_processes: Also start the sandhi splitter processes, if a pool is used.
+                Leave them out when warming up a parent process that is about to fork.
+        """
+        get_malayalam_tokenizer()
+        self.pos_tagger.load()
+        self.chunk_tagger.load()
+        if start_processes and self.sandhi_pool is not None:
+            self.sandhi_pool.start()
+
+    def model_files(self) -> List[Path]:
+        """Model, rule and program files whose contents determine shallow parser output."""
+        tokenizer_dir = self.sandhi_dir.parent.parent / "irtokz"
+        return ([self.pos_model_path, self.chunk_model_path, self.sandhi_config,
+                 self.sandhi_dir / "sandhi_rules" / "testNtrainData999" / "mal9" / "Sandhi_9999",
+                 tokenizer_dir / "data" / "NONBREAKING_PREFIXES", tokenizer_dir / "tokenise.py",
+                 tokenizer_dir / "malayalam.py", self.sandhi_dir.parent / "features.py"]
+                + sorted(self.sandhi_dir.glob("*.class")))
+
+    def close(self):
+        """Stop any persistent sandhi splitter processes and close the parse cache."""
+        if self.sandhi_pool is not None:
+            self.sandhi_pool.close()
+            self.sandhi_pool = None
+        if self.parse_cache is not None:
+            self.parse_cache.close()
 
     def sandhi_split(self, text: str) -> str:
+        with self.metrics.stage("sandhi_split"):
+            return self._sandhi_split(text)
+
+    def sandhi_split_many(self, texts: List[str]) -> List[str]:
+        """Sandhi split ``texts``, spreading them over the splitter processes when there are several."""
+        if self.sandhi_pool is None or self.sandhi_pool.size == 1 or len(texts) < 2:
+            return [self.sandhi_split(text) for text in texts]
+        # One thread per splitter process, each waiting on its own JVM
+        executor = ThreadPoolExecutor(max_workers=min(self.sandhi_pool.size, len(texts)))
+        try:
+            return list(executor.map(self.sandhi_split, texts))
+        finally:
+            # After a timeout or interrupt, splits that have not started are dropped
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _sandhi_split(self, text: str) -> str:
         """Used mostly as found in original repo. Did not refactor"""
+        if self.sandhi_pool is not None:
+            return self.sandhi_pool.split(text)
+
         input_file = self.sandhi_dir / "input.txt"
         output_file = self.sandhi_dir / "san.out"
 
@@ -42,19 +121,23 @@ class MalayalamShallowParser:
         result = subprocess.run(["java", "-cp", str(self.sandhi_dir), "StatisticalSandhiSplitter9", str(config_path)],
                                 cwd=self.sandhi_dir, text=True, capture_output=True, )
 
+        self.metrics.count("subprocess_spawns", tool="java")
+
         if result.returncode != 0:
             raise RuntimeError(result.stderr)
 
-        return output_file.read_text(encoding="utf-8")
+        output = output_file.read_text(encoding="utf-8")
+        self.metrics.count("external_bytes_written", len(text.encode("utf-8")) + len(config_dynamic.encode("utf-8")),
+                           tool="java")
+        self.metrics.count("external_bytes_read", len(output.encode("utf-8")), tool="java")
+        return output
 
     @staticmethod
     def tokenize_sandhi_text(sandhi_text: str) -> List[str]:
         """
         Tokenize Sandhi-split text using IIT-B tokenizer directly (no file IO).
         """
-        tok = tokenize_ind(lang="'mal'", split_sen=False)
-        tokenized = tok.tokenize(sandhi_text)
-        return [t for t in tokenized.split() if t.strip()]
+        return get_malayalam_tokenizer().tokenize(sandhi_text)
 
     @staticmethod
     def featurize_tokens(tokens: List[str]) -> str:
@@ -68,73 +151,40 @@ class MalayalamShallowParser:
             tokens: List of token strings (already tokenized and Sandhi-split)
 
         Returns:
-            List of feature strings (one per token)
+            Feature rows (one per token) joined by newlines
         """
-
-        features = []
-
-        for token in tokens:
-            token = token.strip()
-            if not token:
-                continue
-
-            chars = list(token)
-            length = len(chars)
-            if length == 0:
-                continue
-
-            # Forward and backward substring lists
-            fo1 = ["".join(chars[:i + 1]) for i in range(length)]
-            ba1 = ["".join(chars[-(i + 1):]) for i in range(length)]
-            ba1.reverse()
-
-            # Helper to pad or truncate sequences
-            def pad(seq, size, pad_value="NONE"):
-                if len(seq) >= size:
-                    return seq[:size]
-                return seq + [pad_value] * (size - len(seq))
-
-            # Fixed-length prefix/suffix window
-            prefixes = pad(fo1, 3)
-            suffixes = pad(ba1, 7)
-
-            feature_line = "\t".join([token] + prefixes + suffixes + [str(length)])
-            features.append(feature_line)
-
-        return "\n".join(features)
+        return pos_input(tokens)
 
     def tag_parts_of_speech(self, text: str) -> List[tuple[str, str]]:
         """
         Full pipeline:
         Malayalam sentence → tokens → CRF features → POS tags
         """
+        return self.tag_parts_of_speech_batch([text])[0]
 
-        sandhi_text = self.sandhi_split(text)
-        tokens = self.tokenize_sandhi_text(sandhi_text)
-        crf_input = self.featurize_tokens(tokens)
-
-        # Step 3: Run CRF++
-        with tempfile.NamedTemporaryFile(mode="w+", encoding="utf-8", delete=False) as tmp_in:
-            tmp_in.write(crf_input)
-            tmp_in.flush()
-            tmp_in_path = Path(tmp_in.name)
+    def tag_parts_of_speech_batch(self, texts: List[str]) -> List[List[Tuple[str, str]]]:
+        """
+        POS tag many sentences with one CRF++ run (one model load with the
+        subprocess backend, none with the in-process backend).
 
-        result = subprocess.run(["crf_test", "-m", str(self.pos_model_path), str(tmp_in_path)], text=True,
-                                capture_output=True)
+        Args:
+            texts: Malayalam sentences, e.g. every sentence of one or more documents.
 
-        if result.returncode != 0:
-            raise RuntimeError(f"CRF++ failed with exit code {result.returncode}:\n{result.stderr}")
+        Returns:
+            One list of (token, POS_tag) pairs per input sentence.
+        """
+        return [[(cols[0], cols[-1]) for cols in rows] for rows in self._pos_rows(texts)]
 
-        tagged = []
-        for line in result.stdout.splitlines():
-            if not line.strip():
-                continue
-            cols = line.split("\t")
-            token = cols[0]
-            pos_tag = cols[-1]
-            tagged.append((token, pos_tag))
+    def _pos_rows(self, texts: List[str]) -> List[List[List[str]]]:
+        """POS tagger output rows (feature columns followed by the tag) per sentence."""
+        sandhi_texts = self.sandhi_split_many(texts)
+        with self.metrics.stage("tokenize"):
+            tokenized = get_malayalam_tokenizer().tokenize_many(sandhi_texts)
+        with self.metrics.stage("featurize"):
+            crf_inputs = [pos_input(tokens) for tokens in tokenized]
 
-        return tagged
+        with self.metrics.stage("pos_tagging"):
+            return self.pos_tagger.tag(crf_inputs)
 
     def chunking(self, pos_tagged: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
         """
@@ -146,51 +196,56 @@ class MalayalamShallowParser:
         Returns:
             List of (token, POS_tag, CHUNK_tag) tuples.
         """
-        # Build CRF++ input: all POS-tagged tokens with features + POS as last column
-        feature_lines = []
-        for token, pos in pos_tagged:
-            # reuse same featurization for each token, but append POS at the end
-            chars = list(token)
-            length = len(chars)
-            fo1 = ["".join(chars[:i + 1]) for i in range(length)]
-            ba1 = ["".join(chars[-(i + 1):]) for i in range(length)]
-            ba1.reverse()
+        return self.chunking_batch([pos_tagged])[0]
 
-            def pad(seq, size, pad_value="NONE"):
-                if len(seq) >= size:
-                    return seq[:size]
-                return seq + [pad_value] * (size - len(seq))
+    def chunking_batch(self, pos_tagged_sentences: List[List[Tuple[str, str]]]) -> List[List[Tuple[str, str, str]]]:
+        """
+        Chunk many POS-tagged sentences with one CRF++ run (one model load).
 
-            prefixes = pad(fo1, 3)
-            suffixes = pad(ba1, 7)
+        Args:
+            pos_tagged_sentences: One list of (token, POS_tag) pairs per sentence.
 
-            feature_line = "\t".join([token] + prefixes + suffixes + [str(length), pos])
-            feature_lines.append(feature_line)
+        Returns:
+            One list of (token, POS_tag, CHUNK_tag) tuples per input sentence.
+        """
+        with self.metrics.stage("featurize"):
+            crf_inputs = [chunk_input(pos_tagged) for pos_tagged in pos_tagged_sentences]
+        return self._chunk(crf_inputs)
 
-        crf_input = "\n".join(feature_lines) + "\n"
+    def _chunk(self, crf_inputs: List[str]) -> List[List[Tuple[str, str, str]]]:
+        with self.metrics.stage("chunk_tagging"):
+            outputs = self.chunk_tagger.tag(crf_inputs)
 
-        # Run CRF++ chunking
-        with tempfile.NamedTemporaryFile(mode="w+", encoding="utf-8", delete=False) as tmp_in:
-            tmp_in.write(crf_input)
-            tmp_in.flush()
-            tmp_in_path = Path(tmp_in.name)
+        # The second last col is POS, last col is the chunk prediction
+        return [[(cols[0], cols[-2], cols[-1]) for cols in rows] for rows in outputs]
 
-        result = subprocess.run(["crf_test", "-m", str(self.chunk_model_path), str(tmp_in_path)], text=True,
-                                capture_output=True, )
+    def _parse(self, texts: List[str]) -> List[List[Tuple[str, str, str]]]:
+        # The POS output rows are the chunker's feature columns, so tokens are featurized once
+        return self._chunk([chunk_input_from_rows(rows) for rows in self._pos_rows(texts)])
 
-        tmp_in_path.unlink(missing_ok=True)
+    def shallow_parse_batch(self, texts: List[str]) -> List[List[Tuple[str, str, str]]]:
+        """
+        POS tag and chunk many sentences with two CRF++ runs in total.
+        Sentences found in the parse cache (if enabled) skip the external tools.
 
-        if result.returncode != 0:
-            raise RuntimeError(f"CRF++ Chunking failed:\n{result.stderr}")
-
-        chunked = []
-        for line in result.stdout.splitlines():
-            if not line.strip():
-                continue
-            cols = line.split("\t")
-            token = cols[0]
-            pos_tag = cols[-2]  # The second last col is POS
-            chunk_tag = cols[-1]  # Last col is the chunk prediction
-            chunked.append((token, pos_tag, chunk_tag))
-
-        return chunked
+        Returns:
+            One list of (token, POS_tag, CHUNK_tag) tuples per input sentence.
+        """
+        if self.parse_cache is None:
+            return self._parse(texts)
+
+        results = self.parse_cache.get_many(texts)
+        missing = [i for i, parsed in enumerate(results) if parsed is None]
+        self.metrics.count("parse_cache_hits", len(texts) - len(missing))
+        self.metrics.count("parse_cache_misses", len(missing))
+        if missing:
+            # Parse each distinct missing sentence once
+            keys = {i: self.parse_cache.key(texts[i]) for i in missing}
+            todo = {}
+            for i in missing:
+                todo.setdefault(keys[i], texts[i])
+            parsed = dict(zip(todo, self._parse(list(todo.values()))))
+            self.parse_cache.put_many(list(todo.values()), [parsed[key] for key in todo])
+            for i in missing:
+                results[i] = parsed[keys[i]]
+        return results
@@ -0,0 +1,148 @@
+"""
+Malayalam-only fast path of ``tokenize_ind``.
+
+``MalayalamTokenizer().tokenize(text)`` returns the same tokens as
+``tokenize_ind(lang="mal").tokenize(text).split()``, but runs with fewer
+passes over the text:
+
+- normalization, junk removal and the seven "separate out" character classes
+  are a single ``str.translate`` (they only delete, replace or pad single,
+  disjoint characters)
+- the two Malayalam / non-Malayalam boundary substitutions are one zero-width
+  regex (their matches can never overlap, so inserting a space at every
+  boundary is the same thing)
+- passes that need a particular character (dots, virams, quotes, commas,
+  hyphens) are skipped when the text does not contain it
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+from external.irtokz.tokenise import tokenize_ind
+
+# Malayalam letters and signs; digits 0D66-0D72 are handled separately
+_MAL = u'\u0D00-\u0D65\u0D73-\u0D7f'
+
+
+def _translation_table():
+    table = {}
+    # Characters that tokenize_ind separates out with a space on each side
+    spaced = u'\xa1-\xbf\xd7\xf7\u2012-\u2018\u201a-\u206f\u2200-\u2211\u2213-\u22ff\u2150-\u2160' \
+             u'\u2070-\u209f\u20a0-\u20cf' + r'\\!@#$%^&*()_+={\[}\]|";:<>?`~/'
+    spaced_re = re.compile(u'[%s]' % spaced)
+    for code in range(0x2300):
+        if spaced_re.match(chr(code)):
+            table[code] = u' %s ' % chr(code)
+    # Junk characters, removed
+    for code in range(0x20):
+        table[code] = None
+    # normalize(), which runs first and so overrides the above
+    for char in u'\uFEFF\uFFFE\u2060\u00AD\u200D\u200C':
+        table[ord(char)] = None
+    for char in u'\u200B\u00A0':
+        table[ord(char)] = u' '
+    return table
+
+
+class MalayalamTokenizer:
+    """
+    Precompiled Malayalam tokenizer, cheap to call once per sentence.
+
+    Use ``get_malayalam_tokenizer()`` for the shared instance instead of building
+    a new one per call.
+    """
+
+    def __init__(self):
+        self.NBP = tokenize_ind(lang="mal").NBP
+        self.table = _translation_table()
+
+        self.multidot = re.compile(r'(\.\.+)([^\.])')
+        self.multiviram = re.compile(u'(\u0964\u0964+)([^\u0964])')
+        self.multidviram = re.compile(u'(\u0965\u0965+)([^\u0965])')
+
+        self.nacna = re.compile(u"([^a-zA-Z\u0080-\u024f])(['\u2019])([^a-zA-Z\u0080-\u024f])")
+        self.naca = re.compile(u"([^a-zA-Z0-9\u0966-\u096f\u0080-\u024f])(['\u2019])([a-zA-Z\u0080-\u024f])")
+        self.acna = re.compile(u"([a-zA-Z\u0080-\u024f])(['\u2019])([^a-zA-Z\u0080-\u024f])")
+        self.aca = re.compile(u"([a-zA-Z\u0080-\u024f])(['\u2019])([a-zA-Z\u0080-\u024f])")
+        self.numcs = re.compile(u"([0-9\u0966-\u096f])(['\u2019])s")
+
+        self.latin_letter = re.compile('[a-zA-Z]')
+        self.comma_left = re.compile(u'([^0-9\u0d66-\u0d6f]),')
+        self.comma_right = re.compile(u',([^0-9\u0d66-\u0d6f])')
+        self.script_boundary = re.compile(u'(?<=[%s])(?=[^%s\u2212-])|(?<=[^%s\u2212-])(?=[%s])'
+                                          % (_MAL, _MAL, _MAL, _MAL))
+        self.fractions = {ord(c): u' %s ' % c for c in u'\u0d73\u0d74\u0d75'}
+        self.multihyphen = re.compile('(-+)')
+        self.numeric_hyphen = re.compile(u'(-?[0-9\u0d66-\u0D72]-+[0-9\u0d66-\u0D72]-?){,}')
+
+        self.restoredots = re.compile(r'(DOT)(\1*)MULTI')
+        self.restoreviram = re.compile(r'(PNVM)(\1*)MULTI')
+        self.restoredviram = re.compile(r'(DGVM)(\1*)MULTI')
+
+    def _split_nonbreaking(self, text: str) -> str:
+        words = text.split()
+        text_len = len(words) - 1
+        for i, word in enumerate(words):
+            if not word.endswith('.'):
+                continue
+            dotless = word[:-1]
+            if dotless.isdigit():
+                words[i] = dotless + ' .'
+            elif ('.' in dotless and self.latin_letter.search(dotless)) or \
+                    self.NBP.get(dotless, 0) == 1 or (i < text_len and words[i + 1][0].islower()):
+                pass
+            elif self.NBP.get(dotless, 0) == 2 and (i < text_len and words[i + 1][0].isdigit()):
+                pass
+            elif i < text_len and words[i + 1][0].isdigit():
+                pass
+            else:
+                words[i] = dotless + ' .'
+        return ' '.join(words) + ' '
+
+    def tokenize(self, text: str) -> List[str]:
+        """Tokens of ``text``, equal to ``tokenize_ind(lang="mal").tokenize(text).split()``."""
+        text = u' %s ' % text.translate(self.table)
+
+        if '..' in text:
+            text = self.multidot.sub(lambda m: r' %sMULTI %s' % ('DOT' * len(m.group(1)), m.group(2)), text)
+        if u'\u0964\u0964' in text:
+            text = self.multiviram.sub(lambda m: r' %sMULTI %s' % ('PNVM' * len(m.group(1)), m.group(2)), text)
+        if u'\u0965\u0965' in text:
+            text = self.multidviram.sub(lambda m: r' %sMULTI %s' % ('DGVM' * len(m.group(1)), m.group(2)), text)
+
+        if "'" in text or u'\u2019' in text:
+            text = self.nacna.sub(r"\1 \2 \3", text)
+            text = self.naca.sub(r"\1 \2 \3", text)
+            text = self.acna.sub(r"\1 \2 \3", text)
+            text = self.aca.sub(r"\1 \2\3", text)
+            text = self.numcs.sub(r"\1 \2s", text)
+            text = text.replace("''", " ' ' ")
+
+        text = self._split_nonbreaking(text)
+
+        if ',' in text:
+            text = self.comma_left.sub(r'\1 , ', text)
+            text = self.comma_right.sub(r' , \1', text)
+        text = self.script_boundary.sub(' ', text).translate(self.fractions)
+
+        if '-' in text:
+            text = self.multihyphen.sub(lambda m: ' '.join('-' * len(m.group(1))), text)
+            text = self.numeric_hyphen.sub(lambda m: m.group().replace('-', ' - '), text)
+
+        if 'MULTI' in text:
+            text = ' '.join(text.split())
+            text = self.restoredots.sub(lambda m: '.%s' % ('.' * (len(m.group(2)) // 3)), text)
+            text = self.restoreviram.sub(lambda m: u'\u0964%s' % (u'\u0964' * (len(m.group(2)) // 4)), text)
+            text = self.restoredviram.sub(lambda m: u'\u0965%s' % (u'\u0965' * (len(m.group(2)) // 4)), text)
+        return text.split()
+
+    def tokenize_many(self, texts: Iterable[str]) -> List[List[str]]:
+        """Tokenize every text in ``texts``."""
+        return [self.tokenize(text) for text in texts]
+
+
+@lru_cache(maxsize=None)
+def get_malayalam_tokenizer() -> MalayalamTokenizer:
+    """Shared tokenizer instance, built on first use."""
+    return MalayalamTokenizer()
@@ -323,12 +323,12 @@ class tokenize_ind():
         text = ' '.join(text)
 
         # restore multiple dots, purna virams and deergh virams
-        text = self.restoredots.sub(lambda m: r'.%s' % ('.' * (len(m.group(2)) / 3)), text)
+        text = self.restoredots.sub(lambda m: r'.%s' % ('.' * (len(m.group(2)) // 3)), text)
         if self.urd:
-            text = self.restoreudots.sub(lambda m: u'\u06d4%s' % (u'\u06d4' * (len(m.group(2)) / 4)), text)
+            text = self.restoreudots.sub(lambda m: u'\u06d4%s' % (u'\u06d4' * (len(m.group(2)) // 4)), text)
         else:
-            text = self.restoreviram.sub(lambda m: u'\u0964%s' % (u'\u0964' * (len(m.group(2)) / 4)), text)
-            text = self.restoredviram.sub(lambda m: u'\u0965%s' % (u'\u0965' * (len(m.group(2)) / 4)), text)
+            text = self.restoreviram.sub(lambda m: u'\u0964%s' % (u'\u0964' * (len(m.group(2)) // 4)), text)
+            text = self.restoredviram.sub(lambda m: u'\u0965%s' % (u'\u0965' * (len(m.group(2)) // 4)), text)
 
         # split sentences
         if self.split_sen:
@@ -2,54 +2,46 @@
 Adapted from https://github.com/cmward/hobbs/blob/master/hobbs.py
 """
 
-from typing import Dict, Tuple, Optional, List, Any
-import queue
-import nltk
-from nltk import Tree
-from mlmorph import Analyser
+from __future__ import annotations
+
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Optional, List, Sequence
+
+from candidate_index import NOMINAL_LABELS, CandidateIndex, SentenceCandidates
+from morph_lexicon import MorphFeatureLexicon, analyse_features
+from tree_index import TreeIndex
+
+if TYPE_CHECKING:
+    from mlmorph import Analyser
 
-NOMINAL_LABELS = {"PRP", "NNPS", "NNP", "NNS", "NN"}
 LOCATIVE_PRONOUNS = {"ഇവിടെ", "അവിടെ"}
 REFLEXIVE_SUFFIX = "തന്നെ"   # crude reflexive cue
 PERSONAL_PRONOUNS = {"അവൻ", "അവൾ", "അവർ", "അവള്", "അവന്‍"}  # extend as needed
 DEMONSTRATIVES   = {"ഇത്", "അത്", "ഇവ", "അവ"}
+LEAVES_PER_TOKEN = 2
 
 
-def _first_analysis(analyser: Analyser, token: str) -> tuple[str, int] | dict[Any, Any]:
-    """Return first mlmorph analysis dict (or {} if none)."""
-    try:
-        analyses = analyser.analyse(token)
-        if analyses:
-            return analyses[0]
-    except Exception:
-        pass
-    return {}
-
-def get_feat(analyser: Analyser, token: str) -> Dict[str, str]:
+def get_feat(analyser: Analyser | MorphFeatureLexicon, token: str) -> Dict[str, str]:
     """
     Extract a compact feature bundle from mlmorph for agreement checks.
     Returns keys among: gend, num, pers, case, pos (if available).
+    Lookups go through the cache when given a MorphFeatureLexicon.
     """
-    analys = _first_analysis(analyser, token)
-    feat = analys.get("feat", {}) if isinstance(analys, dict) else {}
-    out = {}
-    for k in ("gend", "num", "pers", "case"):
-        if k in feat:
-            out[k] = feat[k]
-    if "pos" in analys:
-        out["pos"] = analys["pos"]
-    return out
-
-
-def morph_compatible(analyser: Analyser, pronoun_tok: str, np_head_tok: str) -> bool:
+    if isinstance(analyser, MorphFeatureLexicon):
+        return analyser.get_feat(token)
+    return analyse_features(analyser, token)
+
+
+def morph_compatible(analyser: Analyser | MorphFeatureLexicon, pronoun_tok: str, np_head_tok: str) -> bool:
     """
     Malayalam agreement heuristics using mlmorph.
     - person, number, gender must match if both present
     - antecedent case should be nominative or unspecified
     """
-    p = get_feat(analyser, pronoun_tok)
-    a = get_feat(analyser, np_head_tok)
+    return features_agree(get_feat(analyser, pronoun_tok), get_feat(analyser, np_head_tok))
 
+def features_agree(p: Dict[str, str], a: Dict[str, str]) -> bool:
+    """``morph_compatible`` on already looked up feature bundles."""
     # If we couldn't analyze either token, be permissive
     if not p or not a:
         return True
@@ -83,176 +75,188 @@ def classify_pronoun(tok: str) -> str:
         return "demonstrative"
     return "other"
 
-def get_pos(tree: Tree, node) -> Optional[Tuple[int, ...]]:
-    for pos in tree.treepositions():
-        if tree[pos] == node:
-            return pos
-    return None
-
-def bft(tree: Tree):
-    nodes = []
-    q = queue.Queue()
-    q.put(tree)
-    while not q.empty():
-        node = q.get()
-        nodes.append(node)
-        for child in node:
-            if isinstance(child, nltk.Tree):
-                q.put(child)
-    return nodes
-
-def get_dom_np(sents: List[Tree], pos: Tuple[int, ...]):
-    tree = sents[-1]
-    return tree, pos[:-1]
-
-def walk_to_np_or_s(tree: Tree, pos: Tuple[int, ...], label_to_check: str):
+def _is_np(tree: TreeIndex, node: int, label_to_check: str) -> bool:
+    label = tree.labels[node]
+    return label_to_check in label and label not in NOMINAL_LABELS
+
+def locate_pronoun(tree: TreeIndex, token_index: int, token: str) -> Optional[int]:
+    """
+    Return the node directly above the pronoun's leaf.
+
+    list_to_parsable_string writes every token twice, so token ``i`` owns leaf
+    ``2 * i``. Falls back to the first leaf equal to ``token`` when the tree was
+    built some other way.
+    """
+    leaf = LEAVES_PER_TOKEN * token_index
+    if leaf >= len(tree.leaves) or tree.leaves[leaf] != token:
+        leaf = tree.find_leaf(token)
+        if leaf is None:
+            return None
+    return tree.leaf_parent[leaf]
+
+def get_dom_np(tree: TreeIndex, pos: int):
+    return tree, tree.parent[pos] if pos > 0 else pos
+
+def walk_to_np_or_s(tree: TreeIndex, pos: int, label_to_check: str):
     path = [pos]
     while True:
-        pos = pos[:-1]
+        if pos > 0:
+            pos = tree.parent[pos]
         path.append(pos)
-        if label_to_check in tree[pos].label() or tree[pos].label() == "S":
+        if label_to_check in tree.labels[pos] or tree.labels[pos] == "S":
             return path, pos
 
-def check_for_intervening_np(tree: Tree, pos, proposal, pro, label_to_check: str):
-    bf_nodes = bft(tree[pos])
-    bf_pos = [get_pos(tree, node) for node in bf_nodes]
-    # Count at least three NP-like nodes in subtree
-    def _count_np(t):
-        if not isinstance(t, nltk.Tree): return 0
-        if label_to_check in t.label() and t.label() not in NOMINAL_LABELS:
-            return 1 + sum(_count_np(c) for c in t)
-        return sum(_count_np(c) for c in t)
-    if _count_np(tree[pos]) >= 3:
-        for node_pos in bf_pos:
-            if node_pos is None: continue
-            if label_to_check in tree[node_pos].label() and tree[node_pos].label() not in NOMINAL_LABELS:
-                if node_pos != proposal and node_pos != get_pos(tree, pro):
-                    if node_pos < proposal:
-                        return True
-    return False
-
-def traverse_left(tree: Tree, pos, path, pro, label_to_check: str, check=1):
-    bf_nodes = bft(tree[pos])
-    bf_pos = [get_pos(tree, node) for node in bf_nodes]
-    for p in bf_pos:
-        if p is None:
-            continue
-        if p < path[0] and p not in path:
-            if label_to_check in tree[p].label():
-                if check == 1:
-                    if check_for_intervening_np(tree, pos, p, pro, label_to_check):
-                        return tree, p
-                else:
-                    return tree, p
-    return None, None
-
-def traverse_right(tree: Tree, pos, path, pro, label_to_check: str):
-    bf_nodes = bft(tree[pos])
-    bf_pos = [get_pos(tree, node) for node in bf_nodes]
-    for p in bf_pos:
-        if p is None:
-            continue
-        if p > path[0] and p not in path:
-            if label_to_check in tree[p].label() or tree[p].label() == "S":
-                if label_to_check in tree[p].label() and tree[p].label() not in NOMINAL_LABELS:
-                    return tree, p
-                return None, None
+def traverse_left(tree: TreeIndex, pos: int, path: List[int], label_to_check: str, check=1):
+    p = SentenceCandidates.of(tree).left_of(pos, path, label_to_check, check == 1)
+    if p is None:
         return None, None
-
-def traverse_tree(tree: Tree, pro, label_to_check: str):
-    q = queue.Queue()
-    q.put(tree)
-    while not q.empty():
-        node = q.get()
-        if label_to_check in node.label():
-            return tree, get_pos(tree, node)
-        for child in node:
-            if isinstance(child, nltk.Tree):
-                q.put(child)
+    return tree, p
+
+def traverse_right(tree: TreeIndex, pos: int, path: List[int], label_to_check: str):
+    # Only the first node of the subtree's breadth-first walk, pos itself, is ever examined
+    p = pos
+    if p > path[0] and p not in path:
+        if label_to_check in tree.labels[p] or tree.labels[p] == "S":
+            if _is_np(tree, p, label_to_check):
+                return tree, p
     return None, None
 
-def hobbs(sents: List[Tree], pos: Tuple[int, ...], label_to_check: str):
-    sentence_id = len(sents) - 1
-    tree, pos = get_dom_np(sents, pos)
-    pro = tree[pos].leaves()[0].lower()
+def hobbs(sents: CandidateIndex, sentence_id: int, pos: int, label_to_check: str):
+    """
+    Search for an antecedent of the pronoun at node ``pos`` of sentence ``sentence_id``,
+    falling back to earlier sentences in ``sents``.
+    """
+    tree, pos = get_dom_np(sents.tree(sentence_id), pos)
     path, pos = walk_to_np_or_s(tree, pos, label_to_check)
-    proposal = traverse_left(tree, pos, path, pro, label_to_check)
+    proposal = traverse_left(tree, pos, path, label_to_check)
+    stepped_back = False
     while proposal == (None, None):
-        if pos == ():
-            sentence_id -= 1
+        if pos == 0:
+            # Once one earlier sentence has failed, the steps below repeat with the same
+            # outcome, so sentences without a match can be skipped outright
+            if stepped_back:
+                sentence_id = sents.previous_with_match(sentence_id, label_to_check)
+            else:
+                sentence_id -= 1
+                stepped_back = True
             if sentence_id < 0:
                 return None, None
-            proposal = traverse_tree(sents[sentence_id], pro, label_to_check)
+            proposal = sents.first_match(sentence_id, label_to_check)
             if proposal != (None, None):
                 return proposal
         path, pos = walk_to_np_or_s(tree, pos, label_to_check)
-        if label_to_check in tree[pos].label() and tree[pos].label() not in NOMINAL_LABELS:
-            for c in tree[pos]:
-                if isinstance(c, nltk.Tree) and c.label() in NOMINAL_LABELS:
-                    if get_pos(tree, c) not in path:
+        if _is_np(tree, pos, label_to_check):
+            for c in tree.children(pos):
+                if tree.labels[c] in NOMINAL_LABELS:
+                    if c not in path:
                         return tree, pos
-        proposal = traverse_left(tree, pos, path, pro, label_to_check, check=0)
+        proposal = traverse_left(tree, pos, path, label_to_check, check=0)
         if proposal != (None, None):
             return proposal
-        if tree[pos].label() == "S":
-            proposal = traverse_right(tree, pos, path, pro, label_to_check)
+        if tree.labels[pos] == "S":
+            proposal = traverse_right(tree, pos, path, label_to_check)
             if proposal != (None, None):
                 return proposal
     return proposal
 
-def _apply_hobbs(temp_trees: List[Tree], pronoun_token: str, label_to_check: str):
-    pos = get_pos(temp_trees[-1], pronoun_token)
+def _apply_hobbs(index: CandidateIndex, sent_no: int, pronoun_index: int, pronoun_token: str,
+                 label_to_check: str):
+    pos = locate_pronoun(index.tree(sent_no), pronoun_index, pronoun_token)
     if pos is None:
         return None, None
-    pos = pos[:-1]  # drop leaf index
-    return hobbs(temp_trees, pos, label_to_check)
+    return hobbs(index, sent_no, pos, label_to_check)
+
+def _candidate(tree: Optional[TreeIndex], pos: Optional[int]) -> Optional[str]:
+    # The root (id 0) never names an antecedent
+    if tree is None or not pos:
+        return None
+    leaf = tree.first_leaf(pos)
+    return str(leaf) if leaf is not None else None
+
+def resolve_sentence(
+    words: List[str],
+    trees: Sequence[TreeIndex],
+    sent_no: int,
+    pron_indices: List[int],
+    analyser: Analyser | MorphFeatureLexicon,
+    return_all_candidates: bool = False,
+    index: Optional[CandidateIndex] = None,
+) -> Dict[int, List[str]]:
+    """
+    Resolve the pronouns of ``trees[sent_no]``. Only ``trees[:sent_no + 1]`` is
+    searched, so ``trees`` may be a sliding window of recent sentences.
+
+    Args:
+        index: CandidateIndex over ``trees``, shared by all sentences of a document.
+            Built here from ``trees[:sent_no + 1]`` when omitted.
+
+    Returns:
+        Dict mapping pronoun token index → antecedent candidates.
+    """
+    if index is None:
+        index = CandidateIndex(islice(trees, sent_no + 1), lambda token: get_feat(analyser, token))
+    out_for_sent = {}
+
+    for pidx in pron_indices:
+        pro_tok = words[pidx]
+        pclass = classify_pronoun(pro_tok)
+        candidates = []
+
+        # LOCATIVE special-case
+        if pclass == "locative":
+            cand = _candidate(*_apply_hobbs(index, sent_no, pidx, pro_tok, "LOCATIVE"))
+            if cand is not None:
+                if features_agree(index.features(pro_tok), index.features(cand)):
+                    candidates.append(cand)
+            if candidates:
+                out_for_sent[pidx] = candidates
+            continue
+
+        # Regular Hobbs with NP/NN passes
+        for label in ("NP", "NN"):
+            cand = _candidate(*_apply_hobbs(index, sent_no, pidx, pro_tok, label))
+            if cand is None:
+                continue
+
+            # morphology check
+            if features_agree(index.features(pro_tok), index.features(cand)):
+                candidates.append(cand)
+                if not return_all_candidates:
+                    break
+
+        if candidates:
+            out_for_sent[pidx] = list(dict.fromkeys(candidates))
+
+    return out_for_sent
+
+
+def _parse_tree(bracketed: str) -> TreeIndex:
+    from nltk import Tree
+
+    return TreeIndex.from_tree(Tree.fromstring(bracketed))
+
 
 def resolve_pronouns(
     words_list: List[List[str]],
-    parsable_strings: List[str],
+    sentence_trees: List[TreeIndex | str],
     pronouns: dict,
-    analyser: Analyser,
+    analyser: Analyser | MorphFeatureLexicon,
     return_all_candidates: bool = False,
 ):
-    trees = [Tree.fromstring(s) for s in parsable_strings]
+    """
+    Resolve pronouns sentence by sentence.
+
+    ``sentence_trees`` holds one TreeIndex per sentence; bracketed strings are
+    also accepted and parsed with nltk.
+    """
+    trees = [t if isinstance(t, TreeIndex) else _parse_tree(t) for t in sentence_trees]
+    # One candidate index for the whole document, shared by every pronoun
+    index = CandidateIndex(trees, lambda token: get_feat(analyser, token))
     results = {}
 
     for sent_no, pron_indices in pronouns.items():
-        temp_trees = trees[:sent_no + 1]
-        out_for_sent = {}
-
-        for pidx in pron_indices:
-            pro_tok = words_list[sent_no][pidx]
-            pclass = classify_pronoun(pro_tok)
-            candidates = []
-
-            # LOCATIVE special-case
-            if pclass == "locative":
-                tree, pos = _apply_hobbs(temp_trees, pro_tok, "LOCATIVE")
-                if tree and pos:
-                    cand = str(tree[pos].leaves()[0])
-                    if morph_compatible(analyser, pro_tok, cand):
-                        candidates.append(cand)
-                if candidates:
-                    out_for_sent[pidx] = candidates
-                continue
-
-            # Regular Hobbs with NP/NN passes
-            for label in ("NP", "NN"):
-                tree, pos = _apply_hobbs(temp_trees, pro_tok, label)
-                if not (tree and pos):
-                    continue
-                cand = str(tree[pos].leaves()[0])
-
-                # morphology check
-                if morph_compatible(analyser, pro_tok, cand):
-                    candidates.append(cand)
-                    if not return_all_candidates:
-                        break
-
-            if candidates:
-                out_for_sent[pidx] = list(dict.fromkeys(candidates))
-
+        out_for_sent = resolve_sentence(words_list[sent_no], trees, sent_no, pron_indices, analyser,
+                                        return_all_candidates, index)
         if out_for_sent:
             results[sent_no] = out_for_sent
 
@@ -0,0 +1,176 @@
+"""
+Lightweight per-stage timing and counters for the coreference pipeline.
+
+A disabled Metrics object (the default everywhere) turns every call into an
+early return, so instrumentation can stay wired in production code.
+
+    metrics = Metrics(enabled=True)
+    resolver = MalayalamCorefResolver(metrics=metrics)
+    resolver.find_coref(text)
+    print(metrics.to_prometheus())
+"""
+
+import json
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Tuple
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_NULL_CONTEXT = nullcontext()
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    Collects stage duration histograms and labelled counters.
+
+    Hooks registered with ``add_hook`` are called as ``hook(kind, name, value, labels)``
+    for every observation, with kind "stage" (value in seconds) or "counter".
+    """
+
+    def __init__(self, enabled: bool = False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._stages: Dict[str, _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._hooks: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def stage(self, name: str):
+        """Context manager timing one run of a pipeline stage."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageTimer(self, name)
+
+    def observe(self, name: str, seconds: float):
+        """Record a stage duration measured elsewhere."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+        for hook in self._hooks:
+            hook("stage", name, seconds, {})
+
+    def count(self, name: str, value: float = 1, **labels: str):
+        """Increase a counter, e.g. ``count("subprocess_spawns", tool="java")``."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        for hook in self._hooks:
+            hook("counter", name, value, labels)
+
+    def add_hook(self, hook: Callable):
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable):
+        self._hooks.remove(hook)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            stages = {}
+            for name, h in self._stages.items():
+                bounds = [str(b) for b in self.buckets] + ["+Inf"]
+                stages[name] = {"count": h.count, "sum": h.sum, "buckets": dict(zip(bounds, h.counts))}
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in self._counters.items()]
+        return {"stages": stages, "counters": counters}
+
+    def merge(self, snapshot: dict):
+        """Add a ``to_dict`` snapshot, e.g. one taken in a worker process, into this object."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, data in snapshot["stages"].items():
+                histogram = self._stages.get(name)
+                if histogram is None:
+                    histogram = self._stages[name] = _Histogram(self.buckets)
+                for i, n in enumerate(data["buckets"].values()):
+                    histogram.counts[i] += n
+                histogram.sum += data["sum"]
+                histogram.count += data["count"]
+            for counter in snapshot["counters"]:
+                key = (counter["name"], tuple(sorted(counter["labels"].items())))
+                self._counters[key] = self._counters.get(key, 0) + counter["value"]
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "malayalam_coref") -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            if self._stages:
+                metric = f"{prefix}_stage_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for name, h in sorted(self._stages.items()):
+                    cumulative = 0
+                    for bound, n in zip(list(self.buckets) + ["+Inf"], h.counts):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{stage="{name}"}} {h.sum}')
+                    lines.append(f'{metric}_count{{stage="{name}"}} {h.count}')
+
+            by_name: Dict[str, List[Tuple[Labels, float]]] = {}
+            for (name, labels), value in self._counters.items():
+                by_name.setdefault(name, []).append((labels, value))
+            for name, series in sorted(by_name.items()):
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series):
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared disabled instance used when no Metrics object is passed in
+NULL_METRICS = Metrics(enabled=False)
@@ -0,0 +1,151 @@
+"""
+Memoized mlmorph feature lookups for agreement checks.
+
+Usage (prewarm an on-disk store from a vocabulary file, one token per line):
+    python morph_lexicon.py vocab.txt morph_features.sqlite
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+from instrumentation import NULL_METRICS, Metrics
+from tiered_cache import TieredCache
+
+if TYPE_CHECKING:
+    from mlmorph import Analyser
+
+
+def _first_analysis(analyser: Analyser, token: str) -> tuple[str, int] | dict[Any, Any]:
+    """Return first mlmorph analysis dict (or {} if none)."""
+    try:
+        analyses = analyser.analyse(token)
+        if analyses:
+            return analyses[0]
+    except Exception:
+        pass
+    return {}
+
+
+def analyse_features(analyser: Analyser, token: str) -> Dict[str, str]:
+    """
+    Extract a compact feature bundle from mlmorph for agreement checks.
+    Returns keys among: gend, num, pers, case, pos (if available).
+    """
+    analys = _first_analysis(analyser, token)
+    feat = analys.get("feat", {}) if isinstance(analys, dict) else {}
+    out = {}
+    for k in ("gend", "num", "pers", "case"):
+        if k in feat:
+            out[k] = feat[k]
+    if "pos" in analys:
+        out["pos"] = analys["pos"]
+    return out
+
+
+class MorphFeatureLexicon(TieredCache):
+    """
+    Bounded LRU cache of token → feature bundle in front of an mlmorph analyser.
+
+    Tokens without an analysis are cached as an empty bundle, so failing lookups
+    are not retried. An optional sqlite store keeps bundles across runs and can
+    be shared by worker processes; it is consulted on an LRU miss before the
+    analyser is called.
+
+    Returned bundles are shared with the cache and must not be modified.
+    """
+
+    def __init__(self, analyser: Optional[Analyser] = None, maxsize: int = 4096, store_path: Optional[Path] = None,
+                 read_only: bool = False, metrics: Optional[Metrics] = None):
+        """
+        Args:
+            analyser: mlmorph analyser used on cache misses. When omitted, one is
+                built on the first miss, so runs served from the cache never load it.
+            maxsize: Number of tokens kept in memory.
+            store_path: Optional sqlite file backing the in-memory cache.
+            read_only: Never write new bundles to the store.
+            metrics: Optional Metrics counting lookups per cache tier.
+        """
+        super().__init__(maxsize, store_path, read_only)
+        self._analyser = analyser
+        self.metrics = metrics or NULL_METRICS
+
+    @property
+    def analyser(self) -> Analyser:
+        if self._analyser is None:
+            from mlmorph import Analyser
+
+            self._analyser = Analyser()
+        return self._analyser
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("CREATE TABLE IF NOT EXISTS features (token TEXT PRIMARY KEY, feat TEXT)")
+
+    def _store_get(self, token: str) -> Optional[Dict[str, str]]:
+        conn = self._connection()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT feat FROM features WHERE token = ?", (token,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store_put(self, items: Iterable[tuple[str, Dict[str, str]]]):
+        self._write(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO features (token, feat) VALUES (?, ?)",
+            ((token, json.dumps(feat, ensure_ascii=False)) for token, feat in items)))
+
+    def get_feat(self, token: str) -> Dict[str, str]:
+        """Cached equivalent of ``analyse_features(analyser, token)``."""
+        feat = self._recall(token)
+        if feat is not None:
+            self.hits += 1
+            self.metrics.count("morph_lookups", tier="memory")
+            return feat
+
+        feat = self._store_get(token)
+        if feat is not None:
+            self.store_hits += 1
+            self.metrics.count("morph_lookups", tier="store")
+        else:
+            self.misses += 1
+            self.metrics.count("morph_lookups", tier="analyser")
+            feat = analyse_features(self.analyser, token)
+            self._store_put([(token, feat)])
+
+        self._remember(token, feat)
+        return feat
+
+    def prewarm(self, tokens: Iterable[str]):
+        """Analyse tokens ahead of time, filling the store (if any) and the LRU cache."""
+        new_items = []
+        for token in dict.fromkeys(t.strip() for t in tokens):
+            if not token or token in self._cache:
+                continue
+            feat = self._store_get(token)
+            if feat is None:
+                feat = analyse_features(self.analyser, token)
+                new_items.append((token, feat))
+            self._remember(token, feat)
+        self._store_put(new_items)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    vocab_path, store_path = sys.argv[1], sys.argv[2]
+    with open(vocab_path, encoding="utf-8") as f:
+        tokens = [line.strip() for line in f]
+
+    lexicon = MorphFeatureLexicon(maxsize=0, store_path=Path(store_path))
+    lexicon.prewarm(tokens)
+    lexicon.close()
+    print(f"Stored features for {len(set(t for t in tokens if t))} tokens in {store_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+Run the coreference resolver over a corpus using a pool of worker processes.
+
+Input is either JSONL (one object per line with a "text" field and an optional
+"id") or plain text (one document per line). Output is JSONL with one record per
+document, in input order unless --unordered is given.
+
+Progress is checkpointed next to the output file; running the same command
+again after an interruption resumes where it stopped.
+
+Usage (from src/):
+    python run_corpus.py corpus.jsonl results.jsonl --workers 8 --chunk-size 16 --timeout 60
+
+With --preload, models are loaded once in the parent before the workers are
+forked, so workers start immediately and share the loaded analyser and CRF
+models copy-on-write instead of each holding a private copy.
+
+If a worker process dies (e.g. killed for using too much memory), the pool is
+replaced and the batches that were in flight are rerun. The batch that was
+running in the dead worker is rerun document by document, so only a document
+that kills its worker is written with an error.
+
+With --metrics, per-stage timings and external tool counters from all workers
+are written as JSON, or in the Prometheus text format if the file ends in .prom.
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from pathlib import Path
+
+from MalayalamCorefResolver import MalayalamCorefResolver
+from instrumentation import Metrics
+
+_resolver = None
+_timeout = None
+_metrics = None
+# Shared with the parent: this worker's slot in its pool's table of running batches
+_running = None
+_slot = None
+
+
+class DocumentTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise DocumentTimeout()
+
+
+def _build_resolver(sandhi_workers, crf_backend, parse_cache_size, parse_cache_path, timeout, collect_metrics):
+    global _resolver, _timeout, _metrics
+    _metrics = Metrics(enabled=collect_metrics)
+    _resolver = MalayalamCorefResolver(sandhi_workers=sandhi_workers, crf_backend=crf_backend,
+                                       parse_cache_size=parse_cache_size, parse_cache_path=parse_cache_path,
+                                       metrics=_metrics)
+    _timeout = timeout
+
+
+def _init_worker(running, claim, preloaded, *resolver_args):
+    """
+    Build one resolver per worker process, reused for every document it handles.
+    A preloaded resolver was built by the parent and inherited through fork().
+    ``running`` is the pool's table of (pid, running batch) slots, ``claim`` the
+    lock a new worker takes to pick a free one.
+    """
+    global _running, _slot
+    # Let the parent handle Ctrl-C and write its checkpoint
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGALRM, _on_alarm)
+    with claim:
+        _slot = next((i for i in range(0, len(running), 2) if running[i] == 0), None)
+        if _slot is not None:
+            running[_slot] = os.getpid()
+            _running = running
+    if not preloaded:
+        _build_resolver(*resolver_args)
+
+
+def _with_timeout(seconds, func, *args):
+    if seconds:
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return func(*args)
+    finally:
+        if seconds:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _error_message(e):
+    if isinstance(e, DocumentTimeout):
+        return f"timed out after {_timeout}s"
+    return f"{type(e).__name__}: {e}"
+
+
+def _run_batch(jobs):
+    """Process a batch and hand the worker's metrics collected since the last batch to the parent."""
+    if _running is not None:
+        _running[_slot + 1] = jobs[0][0] + 1
+    try:
+        records = _process_batch(jobs)
+    finally:
+        if _running is not None:
+            _running[_slot + 1] = 0
+    if not _metrics.enabled:
+        return records, None
+    snapshot = _metrics.to_dict()
+    _metrics.reset()
+    return records, snapshot
+
+
+def _process_batch(jobs):
+    """
+    Resolve a batch of (index, doc_id, text) jobs, tagging all documents together.
+    If the batch fails or times out, documents are retried one by one so that a
+    single bad document only loses its own result.
+    """
+    if len(jobs) > 1:
+        try:
+            texts = [text for _, _, text in jobs]
+            results = _with_timeout(_timeout * len(jobs) if _timeout else None, _resolver.find_coref_batch, texts)
+            return [(index, doc_id, result, None) for (index, doc_id, _), result in zip(jobs, results)]
+        except Exception:
+            return [record for job in jobs for record in _process_batch([job])]
+
+    index, doc_id, text = jobs[0]
+    try:
+        return [(index, doc_id, _with_timeout(_timeout, _resolver.find_coref, text), None)]
+    except Exception as e:
+        return [(index, doc_id, None, _error_message(e))]
+
+
+def read_documents(path, input_format):
+    """Yield (index, doc_id, text) for every document in the corpus."""
+    if input_format == "auto":
+        input_format = "jsonl" if Path(path).suffix in (".jsonl", ".json") else "text"
+
+    with open(path, encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            if input_format == "jsonl":
+                record = json.loads(line) if line.strip() else {}
+                yield index, record.get("id", index), record.get("text", "")
+            else:
+                yield index, index, line.rstrip("\n")
+
+
+class Checkpoint:
+    """
+    Tracks which documents have been written.
+
+    ``low`` is the number of leading documents that are all done, ``done`` holds
+    finished indices above it (only non-empty with --unordered), and ``offset`` is
+    the output size matching that state. On resume the output is truncated to
+    ``offset``, so records written after the last checkpoint are not duplicated.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.low = 0
+        self.done = set()
+        self.offset = 0
+        if self.path.exists():
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+            self.low = state["low"]
+            self.done = set(state["done"])
+            self.offset = state["offset"]
+
+    def is_done(self, index):
+        return index < self.low or index in self.done
+
+    def mark(self, index):
+        self.done.add(index)
+        while self.low in self.done:
+            self.done.remove(self.low)
+            self.low += 1
+
+    def save(self, offset):
+        self.offset = offset
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps({"low": self.low, "done": sorted(self.done), "offset": offset}),
+                            encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def _batches(jobs, size):
+    jobs = iter(jobs)
+    while batch := list(islice(jobs, size)):
+        yield batch
+
+
+class _Submitted:
+    """
+    A batch of jobs and the future of its result; the future is replaced when the
+    batch is rerun. ``lost`` counts the pools that broke while it was in flight
+    without any batch being identified as the cause.
+    """
+
+    def __init__(self, jobs, future):
+        self.jobs = jobs
+        self.future = future
+        self.lost = 0
+
+
+def _is_broken(future):
+    """Wait for ``future`` and tell whether it was lost to a dead worker process."""
+    return isinstance(future.exception(), BrokenProcessPool)
+
+
+def _died(jobs):
+    return [(index, doc_id, None, "worker process died") for index, doc_id, _ in jobs]
+
+
+class _WorkerPool:
+    """
+    A ProcessPoolExecutor whose workers note which batch they are running, so
+    the batch that killed a worker can be told from those lost along with it.
+    """
+
+    def __init__(self, context, workers, initargs):
+        # (pid, first document index + 1 of the running batch) per worker. Each
+        # slot has a single writer, so the table has no lock: a worker killed
+        # while holding one would leave the parent waiting for it forever.
+        self.running = context.Array("q", 2 * workers, lock=False)
+        self.executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                            initargs=(self.running, context.Lock()) + initargs)
+        self._processes = {}
+
+    def submit(self, jobs):
+        try:
+            return self.executor.submit(_run_batch, jobs)
+        except BrokenProcessPool as e:
+            # Broke since the last result was read; recovered like the batches in flight
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def crashed(self):
+        """
+        First document index of every batch that was running in a worker that died
+        by itself; valid after ``shutdown``. Once a worker dies, the executor stops
+        the others with SIGTERM, so their batches are not to blame.
+        """
+        exitcodes = {process.pid: process.exitcode for process in self._processes.values()}
+        return {self.running[i + 1] - 1 for i in range(0, len(self.running), 2)
+                if self.running[i + 1] and exitcodes.get(self.running[i]) != -signal.SIGTERM}
+
+    def shutdown(self):
+        # The executor forgets its processes on shutdown; keep them for their exit codes
+        self._processes = dict(self.executor._processes or {})
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def terminate(self):
+        """Stop the workers without waiting for their current batches."""
+        # ProcessPoolExecutor has no terminate() before Python 3.14
+        processes = list((self.executor._processes or {}).values())
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+
+# Unexplained pool failures a batch may go through before it is given up
+MAX_LOST = 3
+
+
+def _recover(new_pool, pool, pending):
+    """
+    Replace a pool broken by a dead worker and return the new one.
+
+    Every unfinished batch fails along with the one that killed the worker; they
+    are all resubmitted together. The batch that was running in the dead worker
+    is split into single documents, and a single document that kills its worker
+    is written with an error.
+    """
+    pool.shutdown()
+    wait([submitted.future for submitted in pending])
+    crashed = pool.crashed()
+    pool = new_pool()
+    resubmitted = []
+    for submitted in pending:
+        if not _is_broken(submitted.future):
+            resubmitted.append(submitted)
+            continue
+        if not crashed:
+            submitted.lost += 1
+        if submitted.jobs[0][0] in crashed and len(submitted.jobs) > 1:
+            resubmitted += [_Submitted([job], pool.submit([job])) for job in submitted.jobs]
+            continue
+        if submitted.jobs[0][0] in crashed or submitted.lost >= MAX_LOST:
+            submitted.future = Future()
+            submitted.future.set_result((_died(submitted.jobs), None))
+        else:
+            submitted.future = pool.submit(submitted.jobs)
+        resubmitted.append(submitted)
+    pending.clear()
+    pending.extend(resubmitted)
+    return pool
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("input", help="Corpus file (JSONL or plain text)")
+    arg_parser.add_argument("output", help="JSONL file to write results to")
+    arg_parser.add_argument("--format", choices=("auto", "jsonl", "text"), default="auto",
+                            help="Input format; auto uses the file extension")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    arg_parser.add_argument("--chunk-size", type=int, default=8,
+                            help="Documents sent to a worker at once and tagged together")
+    arg_parser.add_argument("--timeout", type=float, default=None, help="Per-document timeout in seconds")
+    arg_parser.add_argument("--unordered", action="store_true",
+                            help="Write results as they finish instead of in input order")
+    arg_parser.add_argument("--checkpoint", default=None,
+                            help="Checkpoint file (default: <output>.checkpoint)")
+    arg_parser.add_argument("--checkpoint-every", type=int, default=100,
+                            help="Save the checkpoint after this many documents")
+    arg_parser.add_argument("--sandhi-workers", type=int, default=0,
+                            help="Persistent sandhi splitter processes per worker (0 launches one per sentence)")
+    arg_parser.add_argument("--crf-backend", choices=("auto", "inprocess", "subprocess"), default="auto")
+    arg_parser.add_argument("--parse-cache-size", type=int, default=0,
+                            help="Sentences kept in each worker's in-memory shallow parse cache")
+    arg_parser.add_argument("--parse-cache", default=None,
+                            help="sqlite file for a shallow parse cache shared by all workers and runs")
+    arg_parser.add_argument("--preload", action="store_true",
+                            help="Load all models in the parent and fork workers that share them")
+    arg_parser.add_argument("--metrics", default=None,
+                            help="Write stage timings and counters here (JSON, or Prometheus text for .prom)")
+    args = arg_parser.parse_args()
+
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint")
+    if checkpoint.low or checkpoint.done:
+        print(f"Resuming after {checkpoint.low + len(checkpoint.done)} documents", file=sys.stderr)
+
+    jobs = (job for job in read_documents(args.input, args.format) if not checkpoint.is_done(job[0]))
+
+    metrics = Metrics(enabled=args.metrics is not None)
+    n_docs = n_sentences = n_errors = 0
+    start = time.perf_counter()
+
+    with open(args.output, "a+b") as out:
+        out.truncate(checkpoint.offset)
+        out.seek(checkpoint.offset)
+
+        resolver_args = (args.sandhi_workers, args.crf_backend, args.parse_cache_size, args.parse_cache,
+                         args.timeout, metrics.enabled)
+        context = multiprocessing.get_context()
+        if args.preload:
+            _build_resolver(*resolver_args)
+            _resolver.warmup(start_processes=False)
+            # Keep the garbage collector from touching (and so copying) the preloaded objects in workers
+            gc.freeze()
+            context = multiprocessing.get_context("fork")
+
+        def new_pool():
+            return _WorkerPool(context, args.workers, (args.preload,) + resolver_args)
+
+        pool = new_pool()
+        batches = _batches(jobs, args.chunk_size)
+        # Enough batches in flight to keep every worker busy without reading the whole corpus ahead
+        max_pending = 2 * args.workers
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < max_pending and (batch := next(batches, None)):
+                    pending.append(_Submitted(batch, pool.submit(batch)))
+                if not pending:
+                    break
+                if args.unordered:
+                    wait([submitted.future for submitted in pending], return_when=FIRST_COMPLETED)
+                    finished = [submitted for submitted in pending if submitted.future.done()]
+                else:
+                    finished = [pending[0]]
+                if any(_is_broken(submitted.future) for submitted in finished):
+                    pool = _recover(new_pool, pool, pending)
+                    continue
+
+                for submitted in finished:
+                    pending.remove(submitted)
+                    records, snapshot = submitted.future.result()
+                    if snapshot is not None:
+                        metrics.merge(snapshot)
+                    for index, doc_id, result, error in records:
+                        record = {"id": doc_id}
+                        if error is None:
+                            record.update(result)
+                            n_sentences += len(result["sentences"])
+                        else:
+                            record["error"] = error
+                            n_errors += 1
+                        out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                        checkpoint.mark(index)
+                        n_docs += 1
+
+                        if n_docs % args.checkpoint_every == 0:
+                            out.flush()
+                            os.fsync(out.fileno())
+                            checkpoint.save(out.tell())
+        except KeyboardInterrupt:
+            print("Interrupted; progress saved to checkpoint", file=sys.stderr)
+            pool.terminate()
+        finally:
+            pool.shutdown()
+            out.flush()
+            os.fsync(out.fileno())
+            checkpoint.save(out.tell())
+
+    elapsed = time.perf_counter() - start
+    print(f"{n_docs} documents ({n_errors} failed), {n_sentences} sentences in {elapsed:.1f}s: "
+          f"{n_docs / elapsed:.2f} docs/sec, {n_sentences / elapsed:.2f} sentences/sec", file=sys.stderr)
+
+    if args.metrics:
+        text = metrics.to_prometheus() if args.metrics.endswith(".prom") else metrics.to_json(indent=2)
+        Path(args.metrics).write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
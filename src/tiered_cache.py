@@ -0,0 +1,84 @@
+"""
+In-memory LRU cache in front of an optional sqlite store, shared by the
+morphology feature lexicon and the shallow parse cache.
+"""
+
+import os
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TieredCache:
+    """
+    Bounded LRU dict plus the connection to an sqlite store backing it.
+
+    Subclasses create their tables in ``_create_tables``, look values up with
+    ``_recall`` and ``_remember``, and count ``hits``, ``store_hits`` and
+    ``misses`` themselves. The store is only a cache: writes go through
+    ``_write``, which gives up instead of failing while another process holds
+    the database lock.
+    """
+
+    def __init__(self, maxsize: int, store_path: Optional[Path] = None, read_only: bool = False):
+        self.maxsize = maxsize
+        self.store_path = Path(store_path) if store_path else None
+        self.read_only = read_only
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[Hashable, Any] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        raise NotImplementedError
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.store_path is None:
+            return None
+        # sqlite connections must not be shared across fork()
+        if self._conn is None or self._conn_pid != os.getpid():
+            if self.read_only:
+                self._conn = sqlite3.connect(f"file:{self.store_path}?mode=ro", uri=True, timeout=30)
+            else:
+                self._conn = sqlite3.connect(self.store_path, timeout=30)
+                self._create_tables(self._conn)
+                self._conn.commit()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _write(self, write: Callable[[sqlite3.Connection], None]):
+        """Run ``write`` on the store and commit, unless there is no writable store or it is locked."""
+        conn = self._connection()
+        if conn is None or self.read_only:
+            return
+        try:
+            write(conn)
+            conn.commit()
+        except sqlite3.OperationalError:
+            # Another writer holding the lock is not an error
+            conn.rollback()
+
+    def _recall(self, key: Hashable) -> Optional[Any]:
+        """The value cached in memory for ``key``, marked as most recently used, or None."""
+        value = self._cache.get(key)
+        if value is not None:
+            self._cache.move_to_end(key)
+        return value
+
+    def _remember(self, key: Hashable, value: Any):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current in-memory size."""
+        return {"hits": self.hits, "store_hits": self.store_hits, "misses": self.misses, "size": len(self._cache)}
+
+    def close(self):
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
@@ -0,0 +1,202 @@
+"""
+Flat, array-based view of a sentence tree for the Hobbs traversal.
+
+Tree nodes are numbered in preorder, so for any two nodes ``a < b`` holds exactly
+when the nltk tree position of ``a`` sorts before that of ``b``, and the subtree
+of node ``n`` is the id range ``[n, end[n])``. Leaves are not nodes; they are
+kept in a separate list and referenced through leaf spans.
+
+Leaves hold the tokens as they are. Bracketed strings written from a tree spell
+``(`` and ``)`` inside tokens as ``-LRB-`` and ``-RRB-`` (as in the Penn
+Treebank), so a bracket token cannot be read back as tree structure.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from nltk import Tree
+
+BRACKET_ESCAPES = {"(": "-LRB-", ")": "-RRB-"}
+
+
+def escape_brackets(word: str) -> str:
+    """Spell the brackets in a token the way a bracketed tree string can hold them."""
+    for bracket, escaped in BRACKET_ESCAPES.items():
+        word = word.replace(bracket, escaped)
+    return word
+
+
+class TreeIndex:
+    """
+    Per-sentence tree index.
+
+    Build one with ``from_chunks`` (straight from shallow parser output) or
+    ``from_tree`` (from an nltk Tree).
+
+    Attributes:
+        labels: Node label per node id.
+        parent: Parent node id, -1 for the root (id 0).
+        end: One past the last node id of each subtree.
+        leaf_start, leaf_end: Span of leaves under each node.
+        leaves: Leaf strings in order.
+        leaf_parent: Node id directly above each leaf.
+        bfs_order: All node ids in breadth-first order.
+        candidates: Antecedent candidate lists, filled in on first use by
+            ``candidate_index.SentenceCandidates.of``.
+    """
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self.parent: List[int] = []
+        self.end: List[int] = []
+        self.leaf_start: List[int] = []
+        self.leaf_end: List[int] = []
+        self.leaves: List[str] = []
+        self.leaf_parent: List[int] = []
+        self.depth: List[int] = []
+        self.bfs_order: List[int] = []
+        self.candidates = None
+        self._open: List[int] = []
+        self._closed = False
+
+    def _open_node(self, label: str):
+        if self._closed:
+            raise ValueError("Tree has content after the root node was closed")
+        parent = self._open[-1] if self._open else -1
+        node_id = len(self.labels)
+        self.labels.append(label)
+        self.parent.append(parent)
+        self.end.append(node_id + 1)
+        self.leaf_start.append(len(self.leaves))
+        self.leaf_end.append(len(self.leaves))
+        self.depth.append(len(self._open))
+        self._open.append(node_id)
+
+    def _add_leaf(self, word: str):
+        if not self._open:
+            raise ValueError("Leaf outside of the root node")
+        self.leaf_parent.append(self._open[-1])
+        self.leaves.append(word)
+
+    def _close_node(self):
+        if not self._open:
+            raise ValueError("Mismatched parentheses: closing a node that was never opened")
+        node_id = self._open.pop()
+        self.end[node_id] = len(self.labels)
+        self.leaf_end[node_id] = len(self.leaves)
+        if not self._open:
+            self._closed = True
+
+    def _finish(self) -> "TreeIndex":
+        if self._open or not self.labels:
+            raise ValueError("Mismatched parentheses: tree was not closed")
+        # Breadth-first order is level by level, left to right within a level
+        self.bfs_order = sorted(range(len(self.labels)), key=lambda n: (self.depth[n], n))
+        return self
+
+    @classmethod
+    def from_tree(cls, tree: Tree) -> "TreeIndex":
+        """Index an nltk Tree."""
+        from nltk import Tree
+
+        index = cls()
+        # Iterative preorder walk; None closes the most recently opened node
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                index._close_node()
+            elif isinstance(node, Tree):
+                index._open_node(node.label())
+                stack.append(None)
+                stack.extend(reversed(node))
+            else:
+                index._add_leaf(node)
+        return index._finish()
+
+    @classmethod
+    def from_chunks(cls, sentence: List[Tuple[str, str, str]]) -> "TreeIndex":
+        """
+        Index a shallow parsed sentence of (token, pos, chunk) tuples in one pass.
+
+        Produces the same tree as parsing ``MalayalamCorefResolver.list_to_parsable_string``
+        output with ``nltk.Tree.fromstring`` (except that the leaves keep ``(`` and
+        ``)`` rather than ``-LRB-`` and ``-RRB-``), and raises ValueError wherever
+        that parse would fail.
+        """
+        index = cls()
+        index._open_node("S")
+        layerstoclose = 1
+        for word, pos, chunk in sentence:
+            postags = pos.split('__')
+            # New chunk begins
+            if "B-" in chunk:
+                if layerstoclose > 1:
+                    for _ in range(layerstoclose - 1):
+                        index._close_node()
+                    layerstoclose = 1
+                index._open_node("CHUNK")
+                layerstoclose += 1
+            # Add POS tags and token
+            for postag in postags:
+                index._open_node(postag)
+                layerstoclose += 1
+            # Every token is written twice, each followed by a closing bracket
+            for _ in range(2):
+                index._add_leaf(word)
+                index._close_node()
+            layerstoclose -= 2
+        for _ in range(layerstoclose):
+            index._close_node()
+        return index._finish()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def children(self, node: int) -> List[int]:
+        """Child node ids (tree nodes only) of ``node``, left to right."""
+        out = []
+        child = node + 1
+        end = self.end[node]
+        while child < end:
+            out.append(child)
+            child = self.end[child]
+        return out
+
+    def first_leaf(self, node: int) -> Optional[str]:
+        """Equivalent of ``tree[pos].leaves()[0]``."""
+        if self.leaf_start[node] == self.leaf_end[node]:
+            return None
+        return self.leaves[self.leaf_start[node]]
+
+    def find_leaf(self, token: str) -> Optional[int]:
+        """Index of the first leaf equal to ``token``."""
+        try:
+            return self.leaves.index(token)
+        except ValueError:
+            return None
+
+    def to_string(self, node: int = 0) -> str:
+        """Bracketed representation of the subtree at ``node``, for debugging or export."""
+        tree = self.to_tree(node)
+        for position in tree.treepositions("leaves"):
+            tree[position] = escape_brackets(tree[position])
+        return str(tree)
+
+    def to_tree(self, node: int = 0) -> Tree:
+        """Rebuild the subtree at ``node`` as an nltk Tree."""
+        from nltk import Tree
+
+        parts = []
+        leaf = self.leaf_start[node]
+        for child in self.children(node):
+            # Leaves directly under `node` sit between its child subtrees
+            while leaf < self.leaf_start[child]:
+                parts.append(self.leaves[leaf])
+                leaf += 1
+            parts.append(self.to_tree(child))
+            leaf = self.leaf_end[child]
+        parts.extend(self.leaves[leaf:self.leaf_end[node]])
+        return Tree(self.labels[node], parts)